@@ -1,6 +1,28 @@
+import os
+import threading
 from django.apps import AppConfig
 
 
 class RecommenderConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recommender'
+
+    def ready(self):
+        # Connect to IGDB and load the Gemini SDK in the background as soon as
+        # the worker starts, instead of during its first request
+        if os.getenv('RECOMMENDER_WARMUP') == '1':
+            threading.Thread(target=warm_up, name='recommender-warmup', daemon=True).start()
+
+
+def warm_up():
+    """Fetch the IGDB token, open the IGDB connection, and create the Gemini client and semantic index"""
+    from .utils.gemini_api import get_gemini_client
+    from .utils.igdb_api import get_igdb_client
+    from .utils.semantic_cache import get_semantic_index
+
+    # Each step is independent, so one failing does not hold up the others
+    for step in (lambda: get_igdb_client().warm_up(), get_gemini_client, get_semantic_index):
+        try:
+            step()
+        except Exception as e:
+            print(f"Error warming up the recommender: {e}")
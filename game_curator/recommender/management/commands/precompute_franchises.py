@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from recommender.utils.igdb_api import get_igdb_client, get_popular_franchise_ids, precompute_franchises
+
+class Command(BaseCommand):
+    help = "Build and cache the timelines of the most popular franchises, so franchise sections cost nothing on the hot path"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit', type=int, default=200,
+            help="Number of franchises to precompute, most popular first (default: 200)",
+        )
+        parser.add_argument(
+            'franchise_ids', nargs='*', type=int,
+            help="Precompute these franchises instead of the most popular ones",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        client = get_igdb_client()
+
+        franchise_ids = options['franchise_ids'] or get_popular_franchise_ids(client, options['limit'])
+        self.stdout.write(f"Precomputing {len(franchise_ids)} franchises...")
+
+        cached = precompute_franchises(client, franchise_ids)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Cached {cached} franchise timelines in {elapsed:.1f}s"))
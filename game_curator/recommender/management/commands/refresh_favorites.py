@@ -0,0 +1,49 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from recommender.utils.favorites import get_stale_favorite_game_ids, refresh_favorites
+from recommender.utils.igdb_api import get_igdb_client
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the name, cover, summary, rating and release date saved with favorites from IGDB. "
+        "Each stale game is fetched once for all users who favorited it, 500 games per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-age', type=float, default=7,
+            help="Refresh favorites whose snapshot is older than this many days (default: 7)",
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help="IGDB requests in flight at once (default: 4)",
+        )
+        parser.add_argument(
+            '--limit', type=int,
+            help="Refresh at most this many games; the next run continues with the rest",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        game_ids = get_stale_favorite_game_ids(timedelta(days=options['max_age']))
+        if options['limit'] is not None:
+            game_ids = game_ids[:options['limit']]
+        self.stdout.write(f"Refreshing {len(game_ids)} favorited games...")
+
+        def progress(games_done, updated, failed):
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  {games_done + failed}/{len(game_ids)} games, {updated} favorites updated, "
+                f"{failed} failed ({games_done / elapsed:.0f} games/s)"
+            )
+
+        games_done, updated, failed = refresh_favorites(get_igdb_client(), game_ids, options['concurrency'], progress)
+
+        elapsed = time.monotonic() - started
+        rate = games_done / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {games_done} games in {elapsed:.1f}s ({rate:.0f} games/s), {updated} favorites updated"
+        ))
+        if failed:
+            self.stdout.write(self.style.WARNING(f"IGDB did not return {failed} games; they are retried on the next run"))
@@ -0,0 +1,55 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from recommender.utils.igdb_api import get_igdb_client
+from recommender.utils.igdb_catalog import CATALOG_ENDPOINTS, CATALOG_PAGE_SIZE, sync_endpoint
+
+class Command(BaseCommand):
+    help = (
+        "Mirror the IGDB catalog (games, franchises, time-to-beat, genres, themes, platforms, companies) "
+        "into the database. The first run copies everything; later runs only fetch what changed on IGDB "
+        "since the previous one, and an interrupted run resumes where it stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'endpoints', nargs='*', choices=CATALOG_ENDPOINTS,
+            help="Endpoints to sync (default: all, in dependency order)",
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=CATALOG_PAGE_SIZE,
+            help=f"Rows per IGDB request (default: {CATALOG_PAGE_SIZE})",
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Copy every row again instead of only the changed ones",
+        )
+        parser.add_argument(
+            '--max-rows', type=int,
+            help="Stop each endpoint after this many rows; the next run continues from there",
+        )
+
+    def handle(self, *args, **options):
+        # Keep dependency order even when endpoints are given out of order
+        endpoints = [endpoint for endpoint in CATALOG_ENDPOINTS if endpoint in (options['endpoints'] or CATALOG_ENDPOINTS)]
+        client = get_igdb_client()
+
+        for endpoint in endpoints:
+            started = time.monotonic()
+
+            def progress(endpoint, total):
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"  {endpoint}: {total} rows ({total / elapsed:.0f} rows/s)")
+
+            try:
+                total = sync_endpoint(
+                    client, endpoint, options['page_size'], progress,
+                    full=options['full'], max_rows=options['max_rows'],
+                )
+            except RuntimeError as e:
+                raise CommandError(str(e))
+
+            elapsed = time.monotonic() - started
+            rate = total / elapsed if elapsed else 0
+            self.stdout.write(self.style.SUCCESS(
+                f"Synced {total} {endpoint} in {elapsed:.1f}s ({rate:.0f} rows/s)"
+            ))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0003_alter_favorite_cover_url_alter_favorite_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=50)),
+                ('key', models.CharField(max_length=255)),
+                ('value', models.JSONField()),
+                ('expires_at', models.DateTimeField()),
+                ('accessed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['namespace', 'accessed_at'], name='recommender_namespa_cfd785_idx')],
+                'unique_together': {('namespace', 'key')},
+            },
+        ),
+    ]
@@ -0,0 +1,154 @@
+# Generated by Django 5.2 on 2026-10-18 07:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0004_cacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.BigIntegerField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'companies',
+            },
+        ),
+        migrations.CreateModel(
+            name='Franchise',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('url', models.URLField(blank=True, max_length=500)),
+                ('game_ids', models.JSONField(default=list)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='GameTimeToBeat',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('game_id', models.IntegerField(unique=True)),
+                ('hastily', models.IntegerField(blank=True, null=True)),
+                ('normally', models.IntegerField(blank=True, null=True)),
+                ('completely', models.IntegerField(blank=True, null=True)),
+                ('count', models.IntegerField(blank=True, null=True)),
+                ('updated_at', models.BigIntegerField(blank=True, db_index=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.BigIntegerField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Platform',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.BigIntegerField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Theme',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.BigIntegerField(blank=True, db_index=True, null=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Game',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.CharField(blank=True, max_length=255)),
+                ('updated_at', models.BigIntegerField(blank=True, db_index=True, null=True)),
+                ('category', models.IntegerField(blank=True, null=True)),
+                ('version_parent', models.IntegerField(blank=True, null=True)),
+                ('first_release_date', models.BigIntegerField(blank=True, null=True)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('total_rating', models.FloatField(blank=True, null=True)),
+                ('total_rating_count', models.IntegerField(blank=True, null=True)),
+                ('data', models.JSONField()),
+                ('franchise', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='main_games', to='recommender.franchise')),
+                ('franchises', models.ManyToManyField(blank=True, related_name='games', to='recommender.franchise')),
+                ('genres', models.ManyToManyField(blank=True, to='recommender.genre')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='InvolvedCompany',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('developer', models.BooleanField(default=False)),
+                ('publisher', models.BooleanField(default=False)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.company')),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='recommender.game')),
+            ],
+            options={
+                'unique_together': {('game', 'company')},
+            },
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='companies',
+            field=models.ManyToManyField(blank=True, through='recommender.InvolvedCompany', to='recommender.company'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='platforms',
+            field=models.ManyToManyField(blank=True, to='recommender.platform'),
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='themes',
+            field=models.ManyToManyField(blank=True, to='recommender.theme'),
+        ),
+        migrations.CreateModel(
+            name='GameTitle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('search_name', models.CharField(db_index=True, max_length=255)),
+                ('game', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='titles', to='recommender.game')),
+            ],
+            options={
+                'unique_together': {('game', 'search_name')},
+            },
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['category', 'first_release_date'], name='recommender_categor_f8f05c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['total_rating_count'], name='recommender_total_r_be45a7_idx'),
+        ),
+    ]
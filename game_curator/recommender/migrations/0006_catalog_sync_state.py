@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0005_igdb_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('endpoint', models.CharField(max_length=50, unique=True)),
+                ('full_sync_started_at', models.BigIntegerField(blank=True, null=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at_cursor', models.BigIntegerField(blank=True, null=True)),
+                ('cursor_ids', models.JSONField(default=list)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='game',
+            name='parent_game',
+            field=models.IntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
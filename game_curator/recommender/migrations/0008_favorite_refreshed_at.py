@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommender', '0007_favorite_user_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='favorite',
+            name='refreshed_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
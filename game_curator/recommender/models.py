@@ -11,6 +11,8 @@ class Favorite(models.Model):
     rating = models.FloatField(null=True, blank=True)
     first_release_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # When the snapshot above was last refreshed from IGDB (see refresh_favorites)
+    refreshed_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         if self.user:
@@ -19,3 +21,128 @@ class Favorite(models.Model):
 
     class Meta:
         unique_together = ['user', 'game_id']
+        indexes = [
+            # Newest-first favorites pages (see views.favorites_page())
+            models.Index(fields=['user', 'created_at']),
+        ]
+
+class CacheEntry(models.Model):
+    """Value stored by the database backend of recommender.utils.cache"""
+    namespace = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    value = models.JSONField()
+    expires_at = models.DateTimeField()
+    accessed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.namespace}:{self.key}"
+
+    class Meta:
+        unique_together = ['namespace', 'key']
+        indexes = [
+            models.Index(fields=['namespace', 'accessed_at']),
+        ]
+
+class IGDBEntity(models.Model):
+    """Row mirrored from an IGDB endpoint, keyed by its IGDB id"""
+    id = models.IntegerField(primary_key=True)
+    name = models.CharField(max_length=255)
+    slug = models.CharField(max_length=255, blank=True)
+    # UNIX timestamp of the last change on IGDB's side
+    updated_at = models.BigIntegerField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        abstract = True
+
+class Genre(IGDBEntity):
+    pass
+
+class Theme(IGDBEntity):
+    pass
+
+class Platform(IGDBEntity):
+    pass
+
+class Company(IGDBEntity):
+    class Meta:
+        verbose_name_plural = 'companies'
+
+class Franchise(IGDBEntity):
+    url = models.URLField(max_length=500, blank=True)
+    # IGDB ids of the franchise's games, in IGDB's order
+    game_ids = models.JSONField(default=list)
+
+class Game(IGDBEntity):
+    category = models.IntegerField(null=True, blank=True)
+    version_parent = models.IntegerField(null=True, blank=True)
+    # Game this DLC or expansion belongs to
+    parent_game = models.IntegerField(null=True, blank=True, db_index=True)
+    # UNIX timestamp, as in IGDB
+    first_release_date = models.BigIntegerField(null=True, blank=True)
+    rating = models.FloatField(null=True, blank=True)
+    total_rating = models.FloatField(null=True, blank=True)
+    total_rating_count = models.IntegerField(null=True, blank=True)
+    franchise = models.ForeignKey(
+        Franchise, null=True, blank=True, on_delete=models.DO_NOTHING,
+        db_constraint=False, related_name='main_games',
+    )
+    franchises = models.ManyToManyField(Franchise, blank=True, related_name='games')
+    genres = models.ManyToManyField(Genre, blank=True)
+    themes = models.ManyToManyField(Theme, blank=True)
+    platforms = models.ManyToManyField(Platform, blank=True)
+    companies = models.ManyToManyField(Company, blank=True, through='InvolvedCompany')
+    # Raw IGDB row with the same fields as a live details query
+    data = models.JSONField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'first_release_date']),
+            models.Index(fields=['total_rating_count']),
+        ]
+
+class GameTitle(models.Model):
+    """A name a game is known by (its name or an alternative name), used to find games without an IGDB search"""
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, related_name='titles')
+    # normalize_title() of the name
+    search_name = models.CharField(max_length=255, db_index=True)
+
+    class Meta:
+        unique_together = ['game', 'search_name']
+
+class InvolvedCompany(models.Model):
+    game = models.ForeignKey(Game, on_delete=models.CASCADE)
+    company = models.ForeignKey(Company, on_delete=models.CASCADE)
+    developer = models.BooleanField(default=False)
+    publisher = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ['game', 'company']
+
+class GameTimeToBeat(models.Model):
+    id = models.IntegerField(primary_key=True)
+    game_id = models.IntegerField(unique=True)
+    hastily = models.IntegerField(null=True, blank=True)
+    normally = models.IntegerField(null=True, blank=True)
+    completely = models.IntegerField(null=True, blank=True)
+    count = models.IntegerField(null=True, blank=True)
+    updated_at = models.BigIntegerField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"Time to beat for game {self.game_id}"
+
+class CatalogSyncState(models.Model):
+    """Progress of the IGDB catalog sync of one endpoint, saved with every page so syncs can resume"""
+    endpoint = models.CharField(max_length=50, unique=True)
+    # Full sync in progress: when it started (UNIX timestamp) and the last id copied
+    full_sync_started_at = models.BigIntegerField(null=True, blank=True)
+    last_id = models.BigIntegerField(default=0)
+    # Incremental sync: high-water mark of updated_at, and the ids already synced at that exact time
+    updated_at_cursor = models.BigIntegerField(null=True, blank=True)
+    cursor_ids = models.JSONField(default=list)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Sync state of {self.endpoint}"
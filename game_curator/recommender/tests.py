@@ -1,3 +1,524 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest import mock
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from .models import CacheEntry, CatalogSyncState, Favorite
+from .utils.cache import DatabaseBackend, DjangoCacheBackend, LocMemBackend, TTLCache
+from .utils.favorites import get_favorite_ids, get_favorites_cache, get_stale_favorite_game_ids, refresh_favorites
+from .utils import gemini_api, igdb_api
+from .utils.gemini_api import GameNameParser, needs_grounding, prompt_cache_key
+from .utils.igdb_api import normalize_title
+from .utils.igdb_catalog import sync_endpoint
+from .utils.rate_limiter import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, RateLimiter
+from .utils.semantic_cache import SemanticIndex
+from . import views
 
-# Create your tests here.
+class RateLimiterTests(SimpleTestCase):
+    def test_waiting_requests_start_in_priority_order(self):
+        limiter = RateLimiter(rate=1000, max_open=1)
+        limiter.acquire()
+        started = []
+
+        def request(priority):
+            with limiter.slot(priority):
+                started.append(priority)
+
+        threads = [
+            threading.Thread(target=request, args=(priority,))
+            for priority in (PRIORITY_BACKGROUND, PRIORITY_NORMAL, PRIORITY_INTERACTIVE)
+        ]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while limiter.stats()['queue_depth'] < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        limiter.release()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(started, [PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BACKGROUND])
+
+    def test_same_priority_is_first_come_first_served(self):
+        limiter = RateLimiter(rate=1000, max_open=1)
+        first = limiter._enqueue(PRIORITY_NORMAL)
+        second = limiter._enqueue(PRIORITY_NORMAL)
+        self.assertEqual(limiter._try_take(second), None)
+        self.assertEqual(limiter._try_take(first), 0)
+
+class CacheTests(SimpleTestCase):
+    def make_cache(self, max_entries=2):
+        return TTLCache('test', LocMemBackend('test', max_entries), ttl=60)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = self.make_cache()
+        cache.set(1, 'a')
+        cache.set(2, 'b')
+        cache.get(1)
+        cache.set(3, 'c')
+        self.assertEqual([cache.get(key) for key in (1, 2, 3)], ['a', None, 'c'])
+
+    def test_expired_entry_is_a_miss(self):
+        cache = self.make_cache()
+        cache.set(1, 'a', ttl=0)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual((cache.stats()['hits'], cache.stats()['misses']), (0, 1))
+
+    def test_delete_many(self):
+        cache = self.make_cache(max_entries=3)
+        for key in range(3):
+            cache.set(key, key)
+        cache.delete_many([0, 2, 5])
+        self.assertEqual([cache.get(key) for key in range(3)], [None, 1, None])
+
+    def test_cached_values_are_copies(self):
+        cache = self.make_cache()
+        game = {'screenshots': []}
+        cache.set(1, game)
+        game['screenshots'].append('changed')
+        cache.get(1)['screenshots'].append('changed')
+        self.assertEqual(cache.get(1), {'screenshots': []})
+
+    def test_django_cache_keys_fit_memcached(self):
+        backend = DjangoCacheBackend('prompt', 10)
+        key = backend._key('open world games with dragons ' * 20)
+        self.assertLessEqual(len(key), 250)
+        self.assertNotIn(' ', key)
+
+class DatabaseBackendTests(TestCase):
+    def setUp(self):
+        self.backend = DatabaseBackend('test', max_entries=5)
+
+    def test_recent_hit_does_not_write(self):
+        self.backend.set('key', 'value', 60)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.backend.get('key'), (True, 'value'))
+
+    def test_stale_access_time_is_updated(self):
+        self.backend.set('key', 'value', 60)
+        accessed_at = datetime.now(timezone.utc) - DatabaseBackend.TOUCH_INTERVAL * 2
+        CacheEntry.objects.update(accessed_at=accessed_at)
+        with self.assertNumQueries(2):
+            self.backend.get('key')
+        self.assertGreater(CacheEntry.objects.get().accessed_at, accessed_at)
+
+    def test_delete_many_is_one_statement(self):
+        for key in range(3):
+            self.backend.set(key, key, 60)
+        with self.assertNumQueries(1):
+            self.backend.delete_many([0, 1, 5])
+        self.assertEqual(list(CacheEntry.objects.values_list('key', flat=True)), ['2'])
+
+    def test_table_is_culled_every_few_sets(self):
+        for key in range(DatabaseBackend.CULL_EVERY - 1):
+            self.backend.set(key, key, 60)
+        self.assertEqual(CacheEntry.objects.count(), DatabaseBackend.CULL_EVERY - 1)
+        self.backend.set('last', 'value', 60)
+        self.assertEqual(CacheEntry.objects.count(), 5)
+
+class NormalizeTitleTests(SimpleTestCase):
+    def test_punctuation_accents_and_trademarks(self):
+        self.assertEqual(normalize_title('The Witcher® 3: Wild Hunt – Complete Edition'), 'the witcher 3 wild hunt')
+        self.assertEqual(normalize_title('Pokémon  Sword!'), 'pokemon sword')
+        self.assertEqual(normalize_title("Assassin's Creed"), 'assassin s creed')
+
+    def test_edition_suffixes(self):
+        self.assertEqual(normalize_title('Dark Souls: Game of the Year Edition'), 'dark souls')
+        self.assertEqual(normalize_title('Fallout 4 GOTY'), 'fallout 4')
+        self.assertEqual(normalize_title("Halo: Collector's Edition"), 'halo')
+
+    def test_title_that_is_only_an_edition_name(self):
+        self.assertEqual(normalize_title('Complete Edition'), 'complete edition')
+
+class FakeCatalogClient:
+    """Serves scripted pages of an IGDB endpoint and records the queries"""
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.queries = []
+
+    def make_request(self, endpoint, query, priority):
+        self.queries.append(query)
+        return self.pages.pop(0)
+
+class CatalogSyncCursorTests(TestCase):
+    def test_rows_sharing_the_cursor_time_are_not_synced_twice(self):
+        CatalogSyncState.objects.create(endpoint='genres', updated_at_cursor=100)
+        client = FakeCatalogClient([
+            [{'id': 1, 'updated_at': 100}, {'id': 2, 'updated_at': 200}, {'id': 3, 'updated_at': 200}],
+            [{'id': 4, 'updated_at': 200}],
+        ])
+
+        self.assertEqual(sync_endpoint(client, 'genres', page_size=3), 4)
+        self.assertIn('where updated_at >= 100;', client.queries[0])
+        self.assertIn('where updated_at > 200 | (updated_at = 200 & id != (2,3));', client.queries[1])
+
+        state = CatalogSyncState.objects.get(endpoint='genres')
+        self.assertEqual(state.updated_at_cursor, 200)
+        self.assertEqual(state.cursor_ids, [2, 3, 4])
+
+    def test_newer_page_resets_the_tie_break_ids(self):
+        CatalogSyncState.objects.create(endpoint='genres', updated_at_cursor=200, cursor_ids=[2, 3])
+        client = FakeCatalogClient([[{'id': 2, 'updated_at': 300}]])
+
+        sync_endpoint(client, 'genres', page_size=3)
+        state = CatalogSyncState.objects.get(endpoint='genres')
+        self.assertEqual((state.updated_at_cursor, state.cursor_ids), (300, [2]))
+
+class GameLookupTests(TestCase):
+    def setUp(self):
+        igdb_api.get_game_cache().clear()
+
+    def lookup(self, pages):
+        return igdb_api._search_and_get_game_details(FakeCatalogClient(pages), 'Celeste')
+
+    def test_unknown_title_is_remembered(self):
+        self.assertIsNone(self.lookup([[]]))
+        self.assertEqual(igdb_api.get_title_index().get('celeste'), {'game_id': None})
+
+    def test_failed_search_is_not_remembered(self):
+        self.assertIsNone(self.lookup([None]))
+        self.assertIsNone(igdb_api.get_title_index().get('celeste'))
+
+    def test_game_is_cached_once_every_query_succeeded(self):
+        details = [{'id': 1, 'name': 'Celeste', 'dlcs': [2]}]
+        game = self.lookup([[{'id': 1, 'name': 'Celeste'}], details, [], [{'id': 2, 'name': 'Farewell'}]])
+        self.assertEqual(game['add_on_details'][0]['name'], 'Farewell')
+        self.assertEqual(igdb_api.get_game_cache().get(1)['add_on_details'], game['add_on_details'])
+
+    def test_game_missing_its_add_ons_is_not_cached(self):
+        details = [{'id': 1, 'name': 'Celeste', 'dlcs': [2]}]
+        game = self.lookup([[{'id': 1, 'name': 'Celeste'}], details, [], None])
+        self.assertEqual(game['add_on_details'], [])
+        self.assertIsNone(igdb_api.get_game_cache().get(1))
+        self.assertEqual(igdb_api.get_title_index().get('celeste'), {'game_id': 1})
+
+class FranchiseTimelineTests(TestCase):
+    franchise = {'id': 5, 'name': 'Souls', 'games': [1]}
+
+    def test_timeline_is_cached(self):
+        client = FakeCatalogClient([[dict(self.franchise)], [{'id': 1, 'name': 'Dark Souls'}]])
+        franchise = igdb_api._get_franchise_details(client, 5)
+        self.assertEqual(igdb_api.get_franchise_cache().get(5), franchise)
+
+    def test_timeline_missing_its_games_is_not_cached(self):
+        franchise = igdb_api._get_franchise_details(FakeCatalogClient([[dict(self.franchise)], None]), 5)
+        self.assertEqual(franchise['name'], 'Souls')
+        self.assertIsNone(igdb_api.get_franchise_cache().get(5))
+
+class PromptCacheKeyTests(SimpleTestCase):
+    def test_trivially_different_prompts_share_a_key(self):
+        self.assertEqual(prompt_cache_key('Souls-like  games!', 10), prompt_cache_key('souls like games', 10))
+
+    def test_count_is_part_of_the_key(self):
+        self.assertNotEqual(prompt_cache_key('souls like games', 10), prompt_cache_key('souls like games', 5))
+
+class SemanticIndexTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index = SemanticIndex(directory.name, capacity=16, threshold=0.9)
+        self.index.add('games like dark souls', 10, 'dark-souls')
+        self.index.add('racing games for switch', 10, 'racing')
+
+    def test_paraphrase_matches(self):
+        key, similarity = self.index.lookup('dark souls like games', 10)
+        self.assertEqual(key, 'dark-souls')
+        self.assertGreaterEqual(similarity, 0.9)
+
+    def test_added_qualifier_stays_below_the_threshold(self):
+        self.assertIsNone(self.index.lookup('racing games for switch and pc', 10))
+        self.index.threshold = 0.8
+        self.assertEqual(self.index.lookup('racing games for switch and pc', 10)[0], 'racing')
+
+    def test_other_count_does_not_match(self):
+        self.assertIsNone(self.index.lookup('games like dark souls', 5))
+
+    def test_negated_prompt_is_not_served(self):
+        self.assertIsNone(self.index.lookup('games not like dark souls', 10))
+        self.assertIsNone(self.index.lookup('dark souls like games without bosses', 10))
+
+    def test_negated_prompt_is_not_added(self):
+        self.index.add('games like dark souls except elden ring', 10, 'negated')
+        self.assertEqual(self.index.stats()['size'], 2)
+        self.assertEqual(self.index.lookup('games like dark souls', 10)[0], 'dark-souls')
+
+class GameNameParserTests(SimpleTestCase):
+    """Streamed Gemini answers split at arbitrary points"""
+
+    def feed(self, chunks):
+        parser = GameNameParser()
+        game_names = []
+        for chunk in chunks:
+            game_names += parser.feed(chunk)
+        return game_names, parser.done
+
+    def test_names_split_across_chunks(self):
+        game_names, done = self.feed(['```json\n[', '"Hollow', ' Knight", "Cel', 'este"', ', "Dead Cells"]\n```'])
+        self.assertEqual(game_names, ['Hollow Knight', 'Celeste', 'Dead Cells'])
+        self.assertTrue(done)
+
+    def test_escapes_and_brackets_inside_names(self):
+        # The second chunk starts with a quote escaped at the end of the first
+        game_names, _ = self.feed(['["Ori \\"and\\', '" the [Blind] Forest", "Caf\\u00e9"]'])
+        self.assertEqual(game_names, ['Ori "and" the [Blind] Forest', 'Café'])
+
+    def test_name_is_only_returned_once_complete(self):
+        parser = GameNameParser()
+        self.assertEqual(parser.feed('["Hollow Kni'), [])
+        self.assertEqual(parser.feed('ght", "Celeste'), ['Hollow Knight'])
+        self.assertFalse(parser.done)
+
+    def test_text_after_the_array_is_ignored(self):
+        game_names, done = self.feed(['["Celeste"] and also "Hades"'])
+        self.assertEqual(game_names, ['Celeste'])
+        self.assertTrue(done)
+
+    def test_text_without_an_array(self):
+        self.assertEqual(self.feed(['I cannot help with "that"']), ([], False))
+
+    def test_invalid_entries_are_skipped(self):
+        game_names, _ = self.feed(['["Bad \\x escape", 3, "", "Celeste"]'])
+        self.assertEqual(game_names, ['Celeste'])
+
+class FakeGeminiClient:
+    """Streams the same answer from every model, each after its own delay"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.aio = SimpleNamespace(models=self)
+
+    async def generate_content_stream(self, model, contents, config):
+        async def chunks():
+            await asyncio.sleep(self.delays[model])
+            part = SimpleNamespace(text=f'["{model}"]')
+            yield SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+        return chunks()
+
+@mock.patch.dict(os.environ, {'GEMINI_HEDGE': 'model', 'GEMINI_HEDGE_MODEL': 'hedge', 'GEMINI_HEDGE_MIN_SAMPLES': '1'})
+class StreamedHedgeTests(SimpleTestCase):
+    def setUp(self):
+        for stats in (gemini_api._latency_stats, gemini_api._first_name_stats):
+            patcher = mock.patch.dict(stats, {'grounded': gemini_api.LatencyStats(), 'ungrounded': gemini_api.LatencyStats()})
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def stream(self, delays):
+        async def collect():
+            return [game_name async for game_name in gemini_api._ahedged_game_names('roguelikes', 1, False)]
+
+        with mock.patch.object(gemini_api, 'get_gemini_client', return_value=FakeGeminiClient(delays)):
+            return asyncio.run(collect())
+
+    def test_late_first_name_is_hedged(self):
+        # Whole calls take long, but the first name usually comes quickly
+        gemini_api.get_latency_stats(False).record(5)
+        gemini_api.get_first_name_stats(False).record(0.01)
+        self.assertEqual(self.stream({gemini_api.GEMINI_MODEL: 1, 'hedge': 0}), ['hedge'])
+
+    def test_cancelled_call_records_a_lower_bound(self):
+        first_name_stats = gemini_api.get_first_name_stats(False)
+        first_name_stats.record(0.05)
+        self.stream({gemini_api.GEMINI_MODEL: 1, 'hedge': 0})
+        # The first call ran at least until the hedge was sent, then lost and was cancelled
+        latency_stats = gemini_api.get_latency_stats(False)
+        self.assertEqual((latency_stats.calls, first_name_stats.calls), (1, 2))
+        self.assertGreaterEqual(min(latency_stats._latencies), 0.05)
+        self.assertGreaterEqual(min(first_name_stats._latencies), 0.05)
+
+@mock.patch.dict(os.environ, {'GEMINI_GROUNDING': 'auto', 'GEMINI_GROUNDING_RECENT_YEARS': '2'})
+class NeedsGroundingTests(SimpleTestCase):
+
+    def test_recency_phrases(self):
+        self.assertTrue(needs_grounding('upcoming roguelikes'))
+        self.assertTrue(needs_grounding('the latest Zelda-like games'))
+
+    def test_recent_years(self):
+        self.assertTrue(needs_grounding(f'best RPGs of {date.today().year - 1}'))
+        self.assertFalse(needs_grounding('shooters like Half-Life 1998'))
+
+    def test_years_in_titles_do_not_ground(self):
+        self.assertTrue(needs_grounding(f'RPGs coming in {date.today().year + 1}'))
+        self.assertFalse(needs_grounding('games like Cyberpunk 2077'))
+
+    def test_common_words_do_not_ground(self):
+        for prompt in ('a new take on metroidvanias', 'something short to play soon', 'coming of age stories'):
+            self.assertFalse(needs_grounding(prompt), prompt)
+
+class FavoriteStatusTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('player')
+        self.client.force_login(self.user)
+        Favorite.objects.create(user=self.user, game_id=1, name='Game 1')
+
+    def test_status_of_several_games(self):
+        response = self.client.get('/api/favorite-status/?game_ids=1,2').json()
+        self.assertEqual(response, {'success': True, 'is_favorite': {'1': True, '2': False}})
+
+    def test_too_many_game_ids(self):
+        game_ids = ','.join(str(game_id) for game_id in range(views.MAX_FAVORITE_STATUS_IDS + 1))
+        self.assertFalse(self.client.get(f'/api/favorite-status/?game_ids={game_ids}').json()['success'])
+
+class FavoriteIdsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('player')
+        get_favorites_cache().clear()
+
+    def test_ids_are_loaded_from_the_table_once(self):
+        Favorite.objects.create(user=self.user, game_id=1, name='Game 1')
+        self.assertEqual(get_favorite_ids(self.user), {1})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(get_favorite_ids(self.user), {1})
+        self.assertFalse(any('recommender_favorite' in query['sql'] for query in queries))
+
+class FavoritesPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('player')
+        # Every favorite shares one timestamp, so only the id breaks ties
+        created_at = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        Favorite.objects.bulk_create([
+            Favorite(user=self.user, game_id=game_id, name=f'Game {game_id}')
+            for game_id in range(views.FAVORITES_PAGE_SIZE * 2 + 1)
+        ])
+        Favorite.objects.update(created_at=created_at)
+
+    def test_cursor_round_trip(self):
+        favorite = Favorite(id=42, created_at=datetime(2025, 1, 1, 12, 30, 15, 123456, tzinfo=timezone.utc))
+        cursor = views._encode_favorites_cursor(favorite)
+        self.assertEqual(views._decode_favorites_cursor(cursor), (favorite.created_at, 42))
+
+    def test_malformed_cursor(self):
+        for cursor in ('not base64!', 'bm8tc2VwYXJhdG9y', 'eHx5'):
+            with self.assertRaises(ValueError):
+                views._decode_favorites_cursor(cursor)
+
+    def test_pages_cover_every_favorite_once(self):
+        seen = []
+        cursor = None
+        pages = 0
+        while True:
+            favorites, cursor = views._favorites_page(self.user, cursor)
+            seen += [favorite['game_id'] for favorite in favorites]
+            pages += 1
+            if cursor is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+        self.assertEqual(sorted(seen), list(range(views.FAVORITES_PAGE_SIZE * 2 + 1)))
+
+    def test_full_last_page_has_no_cursor(self):
+        Favorite.objects.filter(game_id=0).delete()
+        _, cursor = views._favorites_page(self.user)
+        _, cursor = views._favorites_page(self.user, cursor)
+        self.assertIsNone(cursor)
+
+class FavoritesTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('player', password='secret')
+        self.client.force_login(self.user)
+        get_favorites_cache().clear()
+
+    def post(self, url, data):
+        # Run the on_commit cache invalidation as a committed request would
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(url, json.dumps(data), content_type='application/json').json()
+
+    def toggle(self, game_id):
+        return self.post('/api/toggle-favorite/', {'game_id': game_id, 'name': f'Game {game_id}'})
+
+    def is_favorite(self, game_id):
+        return Favorite.objects.filter(user=self.user, game_id=game_id).exists()
+
+    def test_toggle_adds_then_removes(self):
+        self.assertEqual(self.toggle(1), {'success': True, 'favorite': True})
+        self.assertTrue(self.is_favorite(1))
+        self.assertEqual(self.toggle(1), {'success': True, 'favorite': False})
+        self.assertFalse(self.is_favorite(1))
+
+    def test_chosen_state_is_kept_when_repeated(self):
+        for _ in range(2):
+            self.assertEqual(self.post('/api/toggle-favorite/', {'game_id': 1, 'name': 'Game 1', 'favorite': True}),
+                             {'success': True, 'favorite': True})
+        self.assertTrue(self.is_favorite(1))
+        for _ in range(2):
+            self.assertEqual(self.post('/api/toggle-favorite/', {'game_id': 1, 'favorite': False}),
+                             {'success': True, 'favorite': False})
+        self.assertFalse(self.is_favorite(1))
+
+    def test_toggle_with_stale_cache_that_misses_a_favorite(self):
+        Favorite.objects.create(user=self.user, game_id=1, name='Game 1')
+        get_favorites_cache().set(self.user.pk, [])
+        self.assertEqual(self.toggle(1), {'success': True, 'favorite': False})
+        self.assertFalse(self.is_favorite(1))
+
+    def test_toggle_with_stale_cache_that_lists_a_removed_favorite(self):
+        get_favorites_cache().set(self.user.pk, [1])
+        self.assertEqual(self.toggle(1), {'success': True, 'favorite': True})
+        self.assertTrue(self.is_favorite(1))
+
+    def test_toggle_drops_the_cached_ids(self):
+        self.toggle(1)
+        self.assertIsNone(get_favorites_cache().get(self.user.pk))
+
+    def test_bulk_add_counts_from_the_database(self):
+        Favorite.objects.create(user=self.user, game_id=1, name='Game 1')
+        # The cache claims nothing is a favorite; the counts must not trust it
+        get_favorites_cache().set(self.user.pk, [])
+        games = [{'game_id': game_id, 'name': f'Game {game_id}'} for game_id in (1, 2, 3, 3)]
+        response = self.post('/api/favorites/bulk/', {'action': 'add', 'games': games})
+        self.assertEqual(response, {'success': True, 'added': 2, 'skipped': 2})
+        self.assertEqual(Favorite.objects.filter(user=self.user).count(), 3)
+
+    def test_bulk_import_fetches_the_games_from_igdb(self):
+        Favorite.objects.create(user=self.user, game_id=1, name='Game 1')
+        client = FakeSnapshotClient([{'id': 2, 'name': 'Game 2', 'cover': {'url': '//images.igdb.com/t_thumb/2.jpg'}}])
+        with mock.patch.object(views, 'get_igdb_client', return_value=client):
+            response = self.post('/api/favorites/bulk/', {'action': 'import', 'game_ids': [1, 2, 2, 3]})
+        self.assertEqual(response, {'success': True, 'added': 1, 'skipped': 2, 'failed': 1})
+        self.assertEqual(Favorite.objects.get(user=self.user, game_id=2).cover_url, 'https://images.igdb.com/t_cover_big/2.jpg')
+        self.assertFalse(self.is_favorite(3))
+
+    def test_bulk_remove(self):
+        for game_id in (1, 2):
+            Favorite.objects.create(user=self.user, game_id=game_id, name=f'Game {game_id}')
+        response = self.post('/api/favorites/bulk/', {'action': 'remove', 'game_ids': [1, 5]})
+        self.assertEqual(response, {'success': True, 'removed': 1})
+        self.assertEqual(list(Favorite.objects.values_list('game_id', flat=True)), [2])
+
+    def test_bulk_rejects_unknown_actions_and_oversized_requests(self):
+        self.assertFalse(self.post('/api/favorites/bulk/', {'action': 'merge', 'game_ids': []})['success'])
+        game_ids = list(range(views.MAX_BULK_FAVORITES + 1))
+        self.assertFalse(self.post('/api/favorites/bulk/', {'action': 'remove', 'game_ids': game_ids})['success'])
+
+class FakeSnapshotClient:
+    """Answers every snapshot query with the same games, or fails it if there are none"""
+
+    def __init__(self, games=None):
+        self.games = games
+
+    def make_request(self, endpoint, query, priority):
+        return self.games
+
+class RefreshFavoritesTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('player')
+        Favorite.objects.create(user=user, game_id=1, name='Old name')
+        Favorite.objects.create(user=user, game_id=2, name='Game 2')
+
+    def test_changed_snapshots_are_written(self):
+        client = FakeSnapshotClient([{'id': 1, 'name': 'New name'}, {'id': 2, 'name': 'Game 2'}])
+        self.assertEqual(refresh_favorites(client, [1, 2]), (2, 1, 0))
+        self.assertEqual(Favorite.objects.get(game_id=1).name, 'New name')
+        self.assertEqual(get_stale_favorite_game_ids(timedelta(days=1)), [])
+
+    def test_failed_batch_stays_stale(self):
+        self.assertEqual(refresh_favorites(FakeSnapshotClient(), [1, 2]), (0, 0, 2))
+        self.assertEqual(sorted(get_stale_favorite_game_ids(timedelta(days=1))), [1, 2])
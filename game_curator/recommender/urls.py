@@ -5,6 +5,15 @@ urlpatterns = [
     path('', views.landing_page, name='landing_page'),
     path('recommend/', views.recommender, name='recommender'),
     path('favorites/', views.favorites_page, name='favorites'),
+    path('api/favorites/', views.favorites_list, name='favorites_list'),
+    path('api/favorites/bulk/', views.bulk_favorites, name='bulk_favorites'),
+    path('api/favorites/<int:game_id>/summary/', views.favorite_summary, name='favorite_summary'),
     path('api/toggle-favorite/', views.toggle_favorite, name='toggle_favorite'),
     path('api/get-favorites/', views.get_favorites, name='get_favorites'),
+    path('api/favorite-status/', views.favorite_status, name='favorite_status'),
+    path('api/game/<int:game_id>/addons/', views.game_add_ons, name='game_add_ons'),
+    path('api/game/<int:game_id>/franchise/', views.game_franchise, name='game_franchise'),
+    path('api/game/<int:game_id>/screenshots/', views.game_screenshots, name='game_screenshots'),
+    path('api/game/<int:game_id>/languages/', views.game_languages, name='game_languages'),
+    path('api/stats/', views.service_stats, name='service_stats'),
 ]
\ No newline at end of file
@@ -0,0 +1,336 @@
+import os
+import copy
+import hashlib
+import time
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+
+class LocMemBackend:
+    """In-process backend: an LRU-ordered dict private to the worker process"""
+
+    # Safe to call from async code without a thread hop
+    is_async_safe = True
+
+    def __init__(self, namespace, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (found, value) for a key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+        # Callers mutate what they get back, so never hand out the stored copy
+        return True, copy.deepcopy(value)
+
+    def set(self, key, value, ttl):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+class DjangoCacheBackend:
+    """
+    Backend on top of the Django cache framework
+
+    Eviction is left to the configured cache (see MAX_ENTRIES in the CACHES setting).
+    """
+
+    is_async_safe = False
+
+    def __init__(self, namespace, max_entries, alias=None):
+        self.namespace = namespace
+        self.alias = alias or os.getenv('RECOMMENDER_CACHE_ALIAS', 'default')
+
+    @property
+    def _cache(self):
+        from django.core.cache import caches
+        return caches[self.alias]
+
+    def _key(self, key):
+        # Keys can be normalized prompts and titles, with spaces and any
+        # length, which memcached rejects, so only their hash is used
+        digest = hashlib.sha1(str(key).encode('utf-8')).hexdigest()
+        return f"recommender:{self.namespace}:{digest}"
+
+    def get(self, key):
+        missing = object()
+        value = self._cache.get(self._key(key), missing)
+        if value is missing:
+            return False, None
+        return True, value
+
+    def set(self, key, value, ttl):
+        self._cache.set(self._key(key), value, ttl)
+
+    def delete(self, key):
+        self._cache.delete(self._key(key))
+
+    def delete_many(self, keys):
+        self._cache.delete_many([self._key(key) for key in keys])
+
+    def clear(self):
+        # Other namespaces may share the cache, so only a full clear is possible
+        self._cache.clear()
+
+class DatabaseBackend:
+    """
+    Backend on top of the CacheEntry table, shared by every worker and kept across restarts
+
+    To keep writes off the hot path, a hit only moves an entry's accessed_at
+    when it is older than TOUCH_INTERVAL, and the table is only culled every
+    CULL_EVERY sets, so it can briefly grow past max_entries.
+    """
+
+    is_async_safe = False
+
+    # How stale accessed_at may get before a hit updates it
+    TOUCH_INTERVAL = timedelta(minutes=5)
+
+    # Sets (per worker process) between two culls
+    CULL_EVERY = 100
+
+    # Keys removed by each statement of delete_many()
+    DELETE_BATCH_SIZE = 500
+
+    def __init__(self, namespace, max_entries):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._sets = 0
+        self._lock = threading.Lock()
+
+    @property
+    def _entries(self):
+        from ..models import CacheEntry
+        return CacheEntry.objects.filter(namespace=self.namespace)
+
+    def get(self, key):
+        from django.utils import timezone
+        now = timezone.now()
+        entry = self._entries.filter(key=str(key), expires_at__gt=now).only('pk', 'value', 'accessed_at').first()
+        if entry is None:
+            return False, None
+        # Track recency for LRU eviction, coarsely enough to skip most writes
+        if entry.accessed_at <= now - self.TOUCH_INTERVAL:
+            self._entries.filter(pk=entry.pk).update(accessed_at=now)
+        return True, entry.value
+
+    def set(self, key, value, ttl):
+        from django.utils import timezone
+        now = timezone.now()
+        self._entries.model.objects.update_or_create(
+            namespace=self.namespace,
+            key=str(key),
+            defaults={'value': value, 'expires_at': now + timedelta(seconds=ttl), 'accessed_at': now},
+        )
+        with self._lock:
+            self._sets += 1
+            cull = self._sets % self.CULL_EVERY == 0
+        if cull:
+            self._cull(now)
+
+    def _cull(self, now):
+        """Drop expired entries, then the least recently used ones, once the table is over its limit"""
+        count = self._entries.count()
+        if count <= self.max_entries:
+            return
+        expired, _ = self._entries.filter(expires_at__lte=now).delete()
+        excess = count - expired - self.max_entries
+        if excess > 0:
+            oldest = list(self._entries.order_by('accessed_at').values_list('pk', flat=True)[:excess])
+            self._entries.filter(pk__in=oldest).delete()
+
+    def delete(self, key):
+        self._entries.filter(key=str(key)).delete()
+
+    def delete_many(self, keys):
+        keys = [str(key) for key in keys]
+        # One DELETE per DELETE_BATCH_SIZE keys, within the databases' parameter limits
+        for start in range(0, len(keys), self.DELETE_BATCH_SIZE):
+            self._entries.filter(key__in=keys[start:start + self.DELETE_BATCH_SIZE]).delete()
+
+    def clear(self):
+        self._entries.delete()
+
+class NullBackend:
+    """Backend that stores nothing, used to switch a cache off"""
+
+    is_async_safe = True
+
+    def __init__(self, namespace, max_entries):
+        pass
+
+    def get(self, key):
+        return False, None
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def delete_many(self, keys):
+        pass
+
+    def clear(self):
+        pass
+
+# Backends selectable through the <NAMESPACE>_CACHE_BACKEND environment variables
+CACHE_BACKENDS = {
+    'memory': LocMemBackend,
+    'django': DjangoCacheBackend,
+    'db': DatabaseBackend,
+    'none': NullBackend,
+}
+
+class TTLCache:
+    """Cache with a default time-to-live and hit/miss counters, on top of a pluggable backend"""
+
+    def __init__(self, namespace, backend, ttl):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _count(self, found):
+        with self._lock:
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        """
+        Get a cached value
+
+        Args:
+            key: Cache key (an IGDB id, a normalized name, ...)
+
+        Returns:
+            The cached value, or None on a miss
+        """
+        found, value = self.backend.get(key)
+        self._count(found)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: JSON-serializable value to cache
+            ttl (int): Seconds to keep the value, defaults to the cache's TTL
+        """
+        self.backend.set(key, value, self.ttl if ttl is None else ttl)
+
+    def delete(self, key):
+        """Remove a value if it is cached"""
+        self.backend.delete(key)
+
+    def delete_many(self, keys):
+        """Remove several values, in one round trip (or a few) for the shared backends"""
+        self.backend.delete_many(keys)
+
+    def clear(self):
+        """Remove every value"""
+        self.backend.clear()
+
+    async def aget(self, key):
+        """Async version of get()"""
+        if self.backend.is_async_safe:
+            return self.get(key)
+        return await sync_to_async(self.get)(key)
+
+    async def aset(self, key, value, ttl=None):
+        """Async version of set()"""
+        if self.backend.is_async_safe:
+            return self.set(key, value, ttl)
+        return await sync_to_async(self.set)(key, value, ttl)
+
+    def stats(self):
+        """
+        Get hit/miss counters since startup
+
+        Returns:
+            dict: Backend name, hits, misses and hit rate
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'backend': type(self.backend).__name__,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+# One cache per namespace for the whole process
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(namespace, ttl=3600, max_entries=1000, backend='memory'):
+    """
+    Get the process-wide cache for a namespace, creating it on first use
+
+    The arguments are defaults that can be overridden with environment
+    variables named after the namespace, e.g. GAME_CACHE_BACKEND,
+    GAME_CACHE_TTL and GAME_CACHE_MAX_ENTRIES for the "game" namespace.
+
+    Args:
+        namespace (str): Name of the cache, also used to keep backends apart
+        ttl (int): Default seconds to keep values
+        max_entries (int): Maximum number of values before the least recently used are evicted
+        backend (str): One of CACHE_BACKENDS
+
+    Returns:
+        TTLCache: The cache for this namespace
+    """
+    cache = _caches.get(namespace)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.get(namespace)
+            if cache is None:
+                prefix = f"{namespace.upper()}_CACHE"
+                backend = os.getenv(f"{prefix}_BACKEND", backend)
+                ttl = int(os.getenv(f"{prefix}_TTL", ttl))
+                max_entries = int(os.getenv(f"{prefix}_MAX_ENTRIES", max_entries))
+                if backend not in CACHE_BACKENDS:
+                    raise ValueError(f"Unknown cache backend for {namespace}: {backend}")
+                cache = TTLCache(namespace, CACHE_BACKENDS[backend](namespace, max_entries), ttl)
+                _caches[namespace] = cache
+    return cache
+
+def get_cache_stats():
+    """
+    Get the hit/miss counters of every cache created so far
+
+    Returns:
+        dict: Stats of each cache keyed by namespace
+    """
+    return {namespace: cache.stats() for namespace, cache in _caches.items()}
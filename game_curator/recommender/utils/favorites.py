@@ -0,0 +1,213 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from .cache import get_cache
+from .rate_limiter import PRIORITY_BACKGROUND, PRIORITY_NORMAL
+
+# IGDB ids per request when refreshing favorites, IGDB's largest page
+REFRESH_BATCH_SIZE = 500
+
+# Fields of a Favorite copied from IGDB when it was favorited
+SNAPSHOT_FIELDS = ('name', 'cover_url', 'summary', 'rating', 'first_release_date')
+
+def get_favorites_cache():
+    """
+    Get the cache of each user's favorited IGDB ids, keyed by user id
+
+    Changing a favorite deletes the user's entry, which has to reach every
+    worker, so the cache defaults to the database that all of them share.
+    The settings define no CACHES, so the Django cache is per process and
+    only suits FAVORITES_CACHE_BACKEND=django once CACHES points at a
+    shared cache such as Redis or Memcached.
+    """
+    return get_cache('favorites', ttl=300, max_entries=10000, backend='db')
+
+def get_favorite_ids(user):
+    """
+    Get the IGDB ids of every game a user has favorited
+
+    Loaded from the database once and then served from the favorites cache
+    until the user's favorites change (see forget_favorite_ids()).
+
+    Args:
+        user (User): User whose favorites to get
+
+    Returns:
+        set: IGDB IDs of the user's favorite games
+    """
+    from ..models import Favorite
+
+    favorites_cache = get_favorites_cache()
+    favorite_ids = favorites_cache.get(user.pk)
+    if favorite_ids is None:
+        favorite_ids = list(Favorite.objects.filter(user=user).values_list('game_id', flat=True))
+        favorites_cache.set(user.pk, favorite_ids)
+    return set(favorite_ids)
+
+def forget_favorite_ids(user):
+    """
+    Drop the user's cached favorite ids after their favorites changed
+
+    The entry is deleted rather than updated, since two requests updating
+    it at once could each overwrite the other's change. The delete waits
+    for the current transaction to commit, so the next get_favorite_ids()
+    reloads what was written.
+
+    Args:
+        user (User): User whose favorites changed
+    """
+    from django.db import transaction
+
+    transaction.on_commit(lambda: get_favorites_cache().delete(user.pk))
+
+def get_stale_favorite_game_ids(max_age):
+    """
+    Find the games whose favorites have not been refreshed for a while
+
+    Args:
+        max_age (timedelta): How old a snapshot may get before it is refreshed
+
+    Returns:
+        list: Distinct IGDB ids of the games, in ascending order
+    """
+    from django.db.models import Q
+    from ..models import Favorite
+
+    cutoff = datetime.now(timezone.utc) - max_age
+    stale = Favorite.objects.filter(Q(refreshed_at__isnull=True) | Q(refreshed_at__lt=cutoff))
+    return list(stale.order_by('game_id').values_list('game_id', flat=True).distinct())
+
+def refresh_favorites(client, game_ids, concurrency=4, progress=None):
+    """
+    Refresh the snapshot of every favorite of these games from IGDB
+
+    Each game is fetched once however many users favorited it, 500 games per
+    request, with up to `concurrency` requests in flight (the client's rate
+    limiter still keeps them within IGDB's limits). Each batch is written
+    as soon as it arrives, with one UPDATE for refreshed_at and bulk_update()
+    for the favorites whose snapshot changed. Batches IGDB fails to return
+    are left stale for the next run.
+
+    Args:
+        client (IGDBClient): IGDB API client
+        game_ids (list): Distinct IGDB ids of the games to refresh
+        concurrency (int): IGDB requests in flight at once
+        progress (callable): Called with (games refreshed, favorites updated, games failed) after each batch
+
+    Returns:
+        tuple: (games refreshed, favorites updated, games IGDB failed to return)
+    """
+    batches = [game_ids[start:start + REFRESH_BATCH_SIZE] for start in range(0, len(game_ids), REFRESH_BATCH_SIZE)]
+    games_done = 0
+    updated = 0
+    failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='favorite-refresh') as executor:
+        futures = {
+            executor.submit(client.make_request, 'games', _snapshot_query(batch), PRIORITY_BACKGROUND): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            games = future.result()
+            if games is None:
+                failed += len(batch)
+            else:
+                updated += _apply_snapshots(batch, games)
+                games_done += len(batch)
+            if progress:
+                progress(games_done, updated, failed)
+    return games_done, updated, failed
+
+def import_favorites(client, user, game_ids):
+    """
+    Add favorites for games known only by their IGDB id
+
+    An exported library has no names or covers, so the snapshots are
+    fetched from IGDB 500 games per request, like refresh_favorites() does.
+    Games that are already favorites, or listed twice, are skipped. Games
+    IGDB does not return, including every game of a failed request, are
+    not added.
+
+    Args:
+        client (IGDBClient): IGDB API client
+        user (User): User the favorites belong to
+        game_ids (list): IGDB ids of the games
+
+    Returns:
+        tuple: (favorites added, games skipped, games IGDB did not return)
+    """
+    from ..models import Favorite
+
+    existing_ids = set(Favorite.objects.filter(user=user, game_id__in=game_ids).values_list('game_id', flat=True))
+    new_ids = sorted(set(game_ids) - existing_ids)
+
+    refreshed_at = datetime.now(timezone.utc)
+    favorites = []
+    for start in range(0, len(new_ids), REFRESH_BATCH_SIZE):
+        batch = new_ids[start:start + REFRESH_BATCH_SIZE]
+        for game in client.make_request('games', _snapshot_query(batch), PRIORITY_NORMAL) or []:
+            snapshot = _snapshot(game)
+            snapshot['name'] = snapshot['name'] or ''
+            favorites.append(Favorite(user=user, game_id=game['id'], refreshed_at=refreshed_at, **snapshot))
+
+    # Games a concurrent request just added are left alone by the database
+    Favorite.objects.bulk_create(favorites, batch_size=REFRESH_BATCH_SIZE, ignore_conflicts=True)
+    forget_favorite_ids(user)
+    return len(favorites), len(game_ids) - len(new_ids), len(new_ids) - len(favorites)
+
+def _snapshot_query(game_ids):
+    """Build the query for the snapshot fields of up to 500 games"""
+    ids_string = ','.join(str(game_id) for game_id in game_ids)
+    return (
+        f'where id = ({ids_string}); '
+        f'fields name,summary,cover.url,rating,total_rating,first_release_date; limit {REFRESH_BATCH_SIZE};'
+    )
+
+def _snapshot(game):
+    """Map an IGDB game to the snapshot fields of a Favorite, the way the page fills them in"""
+    cover_url = None
+    if game.get('cover', {}).get('url'):
+        # Same cover size as the recommendation cards
+        cover_url = game['cover']['url'].replace('t_thumb', 't_cover_big')
+        if not cover_url.startswith('https:'):
+            cover_url = 'https:' + cover_url
+    release_date = None
+    if game.get('first_release_date') is not None:
+        release_date = datetime.fromtimestamp(game['first_release_date'], timezone.utc)
+    return {
+        'name': game.get('name'),
+        'cover_url': cover_url,
+        'summary': game.get('summary'),
+        'rating': game.get('total_rating') or game.get('rating'),
+        'first_release_date': release_date,
+    }
+
+def _apply_snapshots(game_ids, games):
+    """
+    Write fetched snapshots to every favorite of a batch of games
+
+    Args:
+        game_ids (list): IGDB ids of the batch
+        games (list): Games IGDB returned for the batch; missing ones keep their snapshot
+
+    Returns:
+        int: Number of favorites whose snapshot changed
+    """
+    from ..models import Favorite
+
+    snapshots = {game['id']: _snapshot(game) for game in games}
+    favorites = Favorite.objects.filter(game_id__in=game_ids)
+    changed = []
+    for favorite in favorites.only('id', 'game_id', *SNAPSHOT_FIELDS):
+        snapshot = snapshots.get(favorite.game_id)
+        if snapshot is None:
+            continue
+        # A game keeps the name it was saved with if IGDB has none
+        snapshot = {field: value for field, value in snapshot.items() if field != 'name' or value}
+        if any(getattr(favorite, field) != value for field, value in snapshot.items()):
+            for field, value in snapshot.items():
+                setattr(favorite, field, value)
+            changed.append(favorite)
+
+    favorites.update(refreshed_at=datetime.now(timezone.utc))
+    Favorite.objects.bulk_update(changed, SNAPSHOT_FIELDS, batch_size=REFRESH_BATCH_SIZE)
+    return len(changed)
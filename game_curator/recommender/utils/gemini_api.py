@@ -1,22 +1,491 @@
 import os
 import json
 import re
-from dotenv import load_dotenv
-from google import genai
-from google.genai import types
-from google.genai.types import Tool, GenerateContentConfig, GoogleSearch
+import hashlib
+import threading
+import time
+import asyncio
+import unicodedata
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from contextlib import aclosing
+from datetime import date
+from asgiref.sync import sync_to_async
+from .cache import get_cache
+from .semantic_cache import get_semantic_index
 
-# Load environment variables from .env file
-load_dotenv()
+# Gemini API client, created on first use (see get_gemini_client())
+_client = None
+_client_lock = threading.Lock()
 
-# Initialize the Gemini API client
-client = genai.Client(api_key=os.getenv('GOOGLE_API_KEY'))
+# Model used for recommendations
+GEMINI_MODEL = 'gemini-2.0-flash-exp'
+
+# When Gemini calls use Google Search grounding (see needs_grounding())
+GROUNDING_MODES = ('auto', 'always', 'never')
+
+# What a hedged second request changes (see _get_hedge()): nothing when
+# "off", the model when "model", grounding when "ungrounded"
+HEDGE_MODES = ('off', 'model', 'ungrounded')
+
+# Words and phrases that ask for recent or future games, which the model only
+# knows about through Google Search. Common words such as "new", "current" or
+# "soon" are left out since most prompts using them are not about release
+# dates ("a new take on", "something to play soon"); recent years are
+# matched separately (see needs_grounding()).
+RECENCY_KEYWORDS = (
+    'latest', 'newest', 'upcoming', 'unreleased', 'this year', 'last year', 'next year', 'this month',
+    'this week', 'new release', 'new releases', 'newly released', 'recently released', 'released recently',
+    'just released', 'recent releases', 'recent games', 'just came out', 'coming soon', 'releasing soon',
+    'out now', 'early access',
+)
+
+class LatencyStats:
+    """Latencies of recent calls of one kind, kept in a sliding window"""
+    
+    def __init__(self, window=500):
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+    
+    def record(self, seconds):
+        """Record the latency of a successful call"""
+        with self._lock:
+            self.calls += 1
+            self._latencies.append(seconds)
+    
+    def record_error(self):
+        """Count a failed call"""
+        with self._lock:
+            self.errors += 1
+    
+    def percentile(self, percent, min_samples=1):
+        """
+        Get a percentile of the recent latencies
+        
+        Args:
+            percent (float): Percentile between 0 and 100
+            min_samples (int): Fewest latencies the percentile is computed from
+            
+        Returns:
+            float: Latency in seconds, or None with fewer latencies than min_samples
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies or len(latencies) < min_samples:
+            return None
+        return latencies[min(int(len(latencies) * percent / 100), len(latencies) - 1)]
+    
+    def stats(self):
+        """
+        Get the call counters and the recent latencies
+        
+        Returns:
+            dict: Calls, errors, and average, median, 95th and 99th percentile latency
+        """
+        with self._lock:
+            latencies = list(self._latencies)
+            calls, errors = self.calls, self.errors
+        median, p95, p99 = self.percentile(50), self.percentile(95), self.percentile(99)
+        return {
+            'calls': calls,
+            'errors': errors,
+            'average_ms': sum(latencies) / len(latencies) * 1000 if latencies else None,
+            'p50_ms': median * 1000 if median is not None else None,
+            'p95_ms': p95 * 1000 if p95 is not None else None,
+            'p99_ms': p99 * 1000 if p99 is not None else None,
+        }
+
+# Latency of Gemini calls with and without grounding, to tune needs_grounding()
+_latency_stats = {
+    'grounded': LatencyStats(),
+    'ungrounded': LatencyStats(),
+}
+
+# Time from the start of a streamed Gemini call to its first game name,
+# which is what the hedge of a streamed call waits for
+_first_name_stats = {
+    'grounded': LatencyStats(),
+    'ungrounded': LatencyStats(),
+}
+
+# Latency of hedged second requests, and of whole recommendation requests
+# from the first call to the answer, which is what hedging shortens
+_hedge_stats = LatencyStats()
+_request_stats = LatencyStats()
+
+# Hedged requests sent, how many of them answered first, and how many were
+# skipped because GEMINI_HEDGE_MAX_IN_FLIGHT hedged requests were running
+_hedge_counts = {'sent': 0, 'won': 0, 'skipped': 0}
+_hedge_counts_lock = threading.Lock()
+_hedges_in_flight = 0
+
+# Runs the calls of hedged blocking requests (see _hedged_game_names())
+_hedge_executor = None
+_hedge_executor_lock = threading.Lock()
+
+def _count_hedge(outcome):
+    """Count a hedged request, one of the keys of _hedge_counts"""
+    with _hedge_counts_lock:
+        _hedge_counts[outcome] += 1
+
+def _start_hedge():
+    """
+    Reserve a slot for a hedged request and count it as sent
+    
+    When Gemini slows down for everyone, every call would be hedged at once
+    and double the load, so at most GEMINI_HEDGE_MAX_IN_FLIGHT hedged
+    requests run at a time. Call _finish_hedge() when a reserved one ends.
+    
+    Returns:
+        bool: Whether the hedged request may be sent
+    """
+    global _hedges_in_flight
+    with _hedge_counts_lock:
+        if _hedges_in_flight >= int(os.getenv('GEMINI_HEDGE_MAX_IN_FLIGHT', 4)):
+            _hedge_counts['skipped'] += 1
+            return False
+        _hedges_in_flight += 1
+        _hedge_counts['sent'] += 1
+        return True
+
+def _finish_hedge(*args):
+    """Release the slot of a hedged request, e.g. as the done callback of its future or task"""
+    global _hedges_in_flight
+    with _hedge_counts_lock:
+        _hedges_in_flight -= 1
+
+# Extra Gemini calls made when an answer has no usable game names at all
+PARSE_RETRIES = 1
+
+# How Gemini answers were parsed: "parsed" as valid JSON, "repaired" by
+# salvaging the complete names of a broken array, "retried" when nothing
+# could be used and the call was made again, and "failed" when the retry
+# did not help either
+_parse_stats = {'parsed': 0, 'repaired': 0, 'retried': 0, 'failed': 0}
+_parse_stats_lock = threading.Lock()
+
+def _count_parse(outcome):
+    """Count how an answer was parsed, one of the keys of _parse_stats"""
+    with _parse_stats_lock:
+        _parse_stats[outcome] += 1
+
+def get_latency_stats(grounded):
+    """Get the latency statistics of grounded or ungrounded Gemini calls"""
+    return _latency_stats['grounded' if grounded else 'ungrounded']
+
+def get_first_name_stats(grounded):
+    """Get the time-to-first-name statistics of streamed grounded or ungrounded Gemini calls"""
+    return _first_name_stats['grounded' if grounded else 'ungrounded']
+
+def get_gemini_stats():
+    """
+    Get the grounding mode and the latency statistics of Gemini calls
+    
+    Returns:
+        dict: Grounding mode, whether structured output is on, stats of
+            grounded and ungrounded calls, and how answers were parsed
+    """
+    with _parse_stats_lock:
+        parse_stats = dict(_parse_stats)
+    with _hedge_counts_lock:
+        hedge_counts = dict(_hedge_counts, in_flight=_hedges_in_flight)
+    return {
+        'grounding': _get_grounding_mode(),
+        'structured_output': _structured_output_enabled(),
+        **{kind: latency_stats.stats() for kind, latency_stats in _latency_stats.items()},
+        'first_name': {kind: latency_stats.stats() for kind, latency_stats in _first_name_stats.items()},
+        'parsing': parse_stats,
+        'hedging': {
+            'mode': _get_hedge_mode(),
+            **hedge_counts,
+            'hedge': _hedge_stats.stats(),
+        },
+        'requests': _request_stats.stats(),
+    }
+
+def _structured_output_enabled():
+    """Whether ungrounded calls ask Gemini for schema-constrained JSON (GEMINI_STRUCTURED_OUTPUT)"""
+    return os.getenv('GEMINI_STRUCTURED_OUTPUT', '1') == '1'
+
+def _get_grounding_mode():
+    """Resolve and validate the grounding mode of Gemini calls"""
+    mode = os.getenv('GEMINI_GROUNDING', 'auto')
+    if mode not in GROUNDING_MODES:
+        raise ValueError(f"Unknown Gemini grounding mode: {mode}")
+    return mode
+
+def get_gemini_client():
+    """
+    Get the shared Gemini client for this process, creating it on first use
+    
+    The google-genai SDK takes most of a second to import, so it is only
+    imported here rather than whenever the views are.
+    
+    Returns:
+        genai.Client: Client authenticated with GOOGLE_API_KEY
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from google import genai
+                _client = genai.Client(api_key=os.getenv('GOOGLE_API_KEY'))
+    return _client
+
+def _get_hedge_mode():
+    """Resolve and validate the hedging mode of Gemini calls"""
+    mode = os.getenv('GEMINI_HEDGE', 'off')
+    if mode not in HEDGE_MODES:
+        raise ValueError(f"Unknown Gemini hedge mode: {mode}")
+    return mode
+
+def _get_hedge(grounded, streaming=False):
+    """
+    Decide how and when to hedge a Gemini call
+    
+    A slow call gets a second, hedged request once it has taken longer than
+    GEMINI_HEDGE_PERCENTILE percent of recent calls of its kind, and the
+    first valid answer wins. A streamed call is hedged when its first name
+    is late, so its delay comes from the time to the first name instead
+    (see get_first_name_stats()). The hedged request goes to GEMINI_HEDGE_MODEL
+    when GEMINI_HEDGE=model, or without grounding when
+    GEMINI_HEDGE=ungrounded. Nothing is hedged until
+    GEMINI_HEDGE_MIN_SAMPLES calls give a meaningful percentile, and at most
+    GEMINI_HEDGE_MAX_IN_FLIGHT hedged requests run at once (see _start_hedge()).
+    
+    Args:
+        grounded (bool): Whether the first call uses grounding
+        streaming (bool): Whether the first call is streamed
+        
+    Returns:
+        tuple: (model, grounded, delay in seconds) of the hedged request, or
+            None when calls are not hedged
+    """
+    mode = _get_hedge_mode()
+    if mode == 'off':
+        return None
+    latency_stats = get_first_name_stats(grounded) if streaming else get_latency_stats(grounded)
+    delay = latency_stats.percentile(
+        float(os.getenv('GEMINI_HEDGE_PERCENTILE', 95)),
+        min_samples=int(os.getenv('GEMINI_HEDGE_MIN_SAMPLES', 20)),
+    )
+    if delay is None:
+        return None
+    if mode == 'model':
+        return os.getenv('GEMINI_HEDGE_MODEL', 'gemini-2.0-flash-lite'), grounded, delay
+    return GEMINI_MODEL, False, delay
+
+def _get_hedge_executor():
+    """
+    Get the thread pool of hedged blocking requests, creating it on first use
+    
+    It runs both calls of each hedged request, so GEMINI_HEDGE_WORKERS should
+    cover the blocking recommendations answered at once plus their hedges.
+    """
+    global _hedge_executor
+    if _hedge_executor is None:
+        with _hedge_executor_lock:
+            if _hedge_executor is None:
+                _hedge_executor = ThreadPoolExecutor(
+                    max_workers=int(os.getenv('GEMINI_HEDGE_WORKERS', 16)),
+                    thread_name_prefix='gemini-hedge',
+                )
+    return _hedge_executor
+
+def needs_grounding(prompt):
+    """
+    Decide whether a prompt needs Google Search grounding
+    
+    Grounding lets Gemini recommend games released after its training data,
+    but makes the call much slower, so in the default "auto" mode it is only
+    used for prompts about recent or future games: those with a recency
+    phrase (RECENCY_KEYWORDS, or the comma-separated
+    GEMINI_GROUNDING_KEYWORDS instead) or with a year from
+    GEMINI_GROUNDING_RECENT_YEARS years ago to next year. Later years are
+    left out, since they are mostly titles such as "Cyberpunk 2077".
+    GEMINI_GROUNDING=always or never overrides the decision.
+    
+    Args:
+        prompt (str): User's prompt
+        
+    Returns:
+        bool: Whether to enable grounding
+    """
+    mode = _get_grounding_mode()
+    if mode != 'auto':
+        return mode == 'always'
+    
+    keywords = os.getenv('GEMINI_GROUNDING_KEYWORDS')
+    keywords = keywords.split(',') if keywords else RECENCY_KEYWORDS
+    
+    # Pad with spaces so keywords only match whole words
+    normalized = f" {normalize_prompt(prompt)} "
+    for keyword in keywords:
+        keyword = normalize_prompt(keyword)
+        if keyword and f" {keyword} " in normalized:
+            return True
+    
+    recent_years = int(os.getenv('GEMINI_GROUNDING_RECENT_YEARS', 2))
+    this_year = date.today().year
+    years = [int(year) for year in re.findall(r'\b(?:19|20)\d\d\b', normalized)]
+    return any(this_year - recent_years <= year <= this_year + 1 for year in years)
+
+def get_prompt_cache():
+    """Get the cache of recommended game names keyed by prompt_cache_key()"""
+    return get_cache('prompt', ttl=24 * 3600, max_entries=10000, backend='db')
+
+def normalize_prompt(prompt):
+    """
+    Normalize a prompt so trivially different spellings share a cache entry
+    
+    Lowercases, strips accents and replaces punctuation and repeated spaces
+    with a single space, so "Souls-like games!" becomes "souls like games".
+    
+    Args:
+        prompt (str): User's prompt
+        
+    Returns:
+        str: Normalized prompt
+    """
+    prompt = unicodedata.normalize('NFKD', prompt)
+    prompt = ''.join(char for char in prompt if not unicodedata.combining(char))
+    return re.sub(r'[^0-9a-z]+', ' ', prompt.lower()).strip()
+
+def prompt_cache_key(prompt, count):
+    """
+    Build the prompt cache key for a recommendation request
+    
+    The normalized prompt is hashed so long prompts fit every cache backend.
+    
+    Args:
+        prompt (str): User's prompt
+        count (int): Number of game recommendations requested
+        
+    Returns:
+        str: Cache key
+    """
+    digest = hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+    return f"{count}:{digest}"
 
 def get_game_recommendations(prompt, count=4):
     """
     Generate video game recommendations based on a user prompt using Google's Gemini API.
     Only returns game names, without any additional information.
     
+    Answers are cached by normalized prompt and count (see get_prompt_cache()),
+    so repeated prompts, and close paraphrases of them (see
+    utils.semantic_cache), skip the Gemini call.
+    
+    Args:
+        prompt (str): User's description of what kind of game they're looking for
+        count (int): Number of game recommendations to generate. 1 main game + 3 similar games.
+        
+    Returns:
+        list: List of strings containing recommended game names
+    """
+    game_names = get_cached_recommendations(prompt, count)
+    if game_names is not None:
+        return game_names
+    
+    grounded = needs_grounding(prompt)
+    started = time.monotonic()
+    game_names = _hedged_game_names(prompt, count, grounded)
+    _request_stats.record(time.monotonic() - started)
+    
+    # Failed answers are not cached so the next request tries again
+    if game_names:
+        cache_recommendations(prompt, count, game_names)
+    return game_names
+
+def _hedged_game_names(prompt, count, grounded):
+    """
+    Ask Gemini for game names, hedging the call when it is slow (see _get_hedge())
+    
+    A blocking call cannot be cancelled, so the slower call is abandoned and
+    finishes in the background.
+    
+    Args:
+        prompt (str): User's prompt
+        count (int): Number of game recommendations to generate
+        grounded (bool): Enable Google Search grounding on the first call
+        
+    Returns:
+        list: Game names of the first valid answer, or an empty list
+    """
+    hedge = _get_hedge(grounded)
+    if hedge is None:
+        return _request_game_names(prompt, count, GEMINI_MODEL, grounded, get_latency_stats(grounded))
+    
+    hedge_model, hedge_grounded, delay = hedge
+    executor = _get_hedge_executor()
+    started = threading.Event()
+    
+    def first_call():
+        started.set()
+        return _request_game_names(prompt, count, GEMINI_MODEL, grounded, get_latency_stats(grounded))
+    
+    first = executor.submit(first_call)
+    # Time the call from when it starts, not while it waits for a free worker
+    started.wait()
+    try:
+        return first.result(timeout=delay)
+    except FutureTimeoutError:
+        pass
+    
+    if not _start_hedge():
+        return first.result()
+    second = executor.submit(_request_game_names, prompt, count, hedge_model, hedge_grounded, _hedge_stats)
+    second.add_done_callback(_finish_hedge)
+    for future in as_completed([first, second]):
+        game_names = future.result()
+        if game_names:
+            if future is second:
+                _count_hedge('won')
+            return game_names
+    return []
+
+def _request_game_names(prompt, count, model, grounded, latency_stats):
+    """
+    Make one Gemini call, and one more if its answer has no usable game names
+    
+    Args:
+        prompt (str): User's prompt
+        count (int): Number of game recommendations to generate
+        model (str): Gemini model to ask
+        grounded (bool): Enable Google Search grounding
+        latency_stats (LatencyStats): Where to record the latency of the call
+        
+    Returns:
+        list: Recommended game names, or an empty list
+    """
+    for attempt in range(PARSE_RETRIES + 1):
+        started = time.monotonic()
+        try:
+            # Make the request, with Google Search grounding when the prompt needs it
+            response = get_gemini_client().models.generate_content(
+                model=model,
+                contents=prompt,
+                config=_build_config(count, grounded)
+            )
+            game_names = _parse_game_names(response, count)
+        except Exception as e:
+            # Log the error and return an empty list
+            latency_stats.record_error()
+            print(f"Error getting recommendations from Gemini: {e}")
+            return []
+        latency_stats.record(time.monotonic() - started)
+        
+        if game_names:
+            return game_names
+        _count_parse('retried' if attempt < PARSE_RETRIES else 'failed')
+    return []
+
+async def aget_game_recommendations(prompt, count=4):
+    """
+    Async version of get_game_recommendations()
+    
     Args:
         prompt (str): User's description of what kind of game they're looking for
         count (int): Number of game recommendations to generate. 1 main game + 3 similar games.
@@ -24,6 +493,301 @@ def get_game_recommendations(prompt, count=4):
     Returns:
         list: List of strings containing recommended game names
     """
+    return [game_name async for game_name in aiter_game_recommendations(prompt, count)]
+
+async def aiter_game_recommendations(prompt, count=4):
+    """
+    Stream recommended game names, each one as soon as Gemini has written it
+    
+    The response is streamed and parsed as it arrives (see GameNameParser),
+    so callers can start looking up the first games while Gemini is still
+    generating the others. Pass the iterator to igdb_api.aiter_game_details()
+    to do that.
+    
+    Args:
+        prompt (str): User's description of what kind of game they're looking for
+        count (int): Number of game recommendations to generate. 1 main game + 3 similar games.
+        
+    Yields:
+        str: Recommended game names, best match first
+    """
+    game_names = await sync_to_async(get_cached_recommendations)(prompt, count)
+    if game_names is not None:
+        for game_name in game_names:
+            yield game_name
+        return
+    
+    game_names = []
+    grounded = needs_grounding(prompt)
+    started = time.monotonic()
+    async for game_name in _ahedged_game_names(prompt, count, grounded):
+        game_names.append(game_name)
+        yield game_name
+    _request_stats.record(time.monotonic() - started)
+    
+    if game_names:
+        await sync_to_async(cache_recommendations)(prompt, count, game_names)
+
+async def _ahedged_game_names(prompt, count, grounded):
+    """
+    Stream game names from Gemini, hedging the call when it is slow (see _get_hedge())
+    
+    The first call to name a game wins, and the other one is cancelled.
+    
+    Args:
+        prompt (str): User's prompt
+        count (int): Number of game recommendations to generate
+        grounded (bool): Enable Google Search grounding on the first call
+        
+    Yields:
+        str: Game names of the winning call
+    """
+    first = _astream_game_names(
+        prompt, count, GEMINI_MODEL, grounded, get_latency_stats(grounded), get_first_name_stats(grounded)
+    )
+    hedge = _get_hedge(grounded, streaming=True)
+    if hedge is None:
+        async for game_name in first:
+            yield game_name
+        return
+    
+    hedge_model, hedge_grounded, delay = hedge
+    started = time.monotonic()
+    names = asyncio.Queue()
+    
+    async def pump(attempt, game_names):
+        # Pass the names of one call on, tagged with the call, then its end (None)
+        try:
+            async with aclosing(game_names):
+                async for game_name in game_names:
+                    names.put_nowait((attempt, game_name))
+        finally:
+            names.put_nowait((attempt, None))
+    
+    tasks = [asyncio.create_task(pump(0, first))]
+    winner = None
+    finished = set()
+    hedge_due = True
+    try:
+        while True:
+            timeout = None
+            if winner is None and hedge_due:
+                timeout = max(delay - (time.monotonic() - started), 0)
+            try:
+                attempt, game_name = await asyncio.wait_for(names.get(), timeout)
+            except asyncio.TimeoutError:
+                hedge_due = False
+                if _start_hedge():
+                    second = _astream_game_names(prompt, count, hedge_model, hedge_grounded, _hedge_stats)
+                    tasks.append(asyncio.create_task(pump(1, second)))
+                    tasks[1].add_done_callback(_finish_hedge)
+                continue
+            
+            if game_name is None:
+                finished.add(attempt)
+                if attempt == winner or (winner is None and len(finished) == len(tasks)):
+                    return
+                continue
+            if winner is None:
+                winner = attempt
+                if winner == 1:
+                    _count_hedge('won')
+                for task in tasks:
+                    if task is not tasks[winner]:
+                        task.cancel()
+            if attempt == winner:
+                yield game_name
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def _astream_game_names(prompt, count, model, grounded, latency_stats, first_name_stats=None):
+    """
+    Stream the game names of one Gemini call, and of one more if it names none
+    
+    A call cancelled before it ends, such as the loser of a hedge, records
+    how long it ran so far as its latency. It took at least that long, and
+    leaving the slowest calls out would pull the percentiles down.
+    
+    Args:
+        prompt (str): User's prompt
+        count (int): Number of game recommendations to generate
+        model (str): Gemini model to ask
+        grounded (bool): Enable Google Search grounding
+        latency_stats (LatencyStats): Where to record the latency of the call
+        first_name_stats (LatencyStats): Where to record the time to the
+            first game name, or None
+        
+    Yields:
+        str: Recommended game names, best match first
+    """
+    game_names = []
+    call_started = time.monotonic()
+    for attempt in range(PARSE_RETRIES + 1):
+        parser = GameNameParser()
+        started = time.monotonic()
+        try:
+            stream = await get_gemini_client().aio.models.generate_content_stream(
+                model=model,
+                contents=prompt,
+                config=_build_config(count, grounded)
+            )
+            async for chunk in stream:
+                new_names = _validate_game_names(parser.feed(_chunk_text(chunk)), count, game_names)
+                if new_names and not game_names and first_name_stats is not None:
+                    first_name_stats.record(time.monotonic() - call_started)
+                for game_name in new_names:
+                    game_names.append(game_name)
+                    yield game_name
+                # Stop reading once the array is complete
+                if parser.done or len(game_names) >= count:
+                    break
+        except asyncio.CancelledError:
+            # Only a lower bound, but still a sample
+            latency_stats.record(time.monotonic() - started)
+            if not game_names and first_name_stats is not None:
+                first_name_stats.record(time.monotonic() - call_started)
+            raise
+        except Exception as e:
+            # Log the error; the names found so far still stand
+            latency_stats.record_error()
+            print(f"Error getting recommendations from Gemini: {e}")
+            return
+        latency_stats.record(time.monotonic() - started)
+        
+        if game_names:
+            # A stream cut short still yields its complete names
+            _count_parse('parsed' if parser.done or len(game_names) >= count else 'repaired')
+            return
+        print("No game names found in the Gemini response")
+        _count_parse('retried' if attempt < PARSE_RETRIES else 'failed')
+
+class GameNameParser:
+    """
+    Incremental parser for the JSON array of game names in a streamed response
+    
+    Text before the array (e.g. a Markdown code fence) is skipped, and each
+    string of the array is returned as soon as its closing quote arrives.
+    """
+    
+    def __init__(self):
+        self.done = False
+        self._in_array = False
+        self._literal = None
+        self._escaped = False
+    
+    def feed(self, text):
+        """
+        Parse the next chunk of the response
+        
+        Args:
+            text (str): Next piece of the response text
+            
+        Returns:
+            list: Game names completed by this chunk
+        """
+        game_names = []
+        for char in text:
+            if self.done:
+                break
+            if self._literal is not None:
+                # Inside a string: collect it until its unescaped closing quote
+                self._literal.append(char)
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    game_name = self._decode(''.join(self._literal))
+                    if game_name:
+                        game_names.append(game_name)
+                    self._literal = None
+            elif not self._in_array:
+                self._in_array = char == '['
+            elif char == '"':
+                self._literal = [char]
+            elif char == ']':
+                self.done = True
+        return game_names
+    
+    def _decode(self, literal):
+        """Decode a JSON string literal, or None if it is malformed"""
+        try:
+            return json.loads(literal)
+        except json.JSONDecodeError as e:
+            print(f"Error parsing game name from Gemini response: {e}")
+            return None
+
+def _chunk_text(chunk):
+    """Get the text of a streamed response chunk"""
+    if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
+        return ''.join(part.text or '' for part in chunk.candidates[0].content.parts)
+    return ''
+
+def get_cached_recommendations(prompt, count):
+    """
+    Get the cached game names for this prompt or, failing that, for the most similar earlier prompt
+    
+    Args:
+        prompt (str): User's prompt
+        count (int): Number of game recommendations requested
+        
+    Returns:
+        list: Cached game names, or None on a miss
+    """
+    prompt_cache = get_prompt_cache()
+    key = prompt_cache_key(prompt, count)
+    game_names = prompt_cache.get(key)
+    if game_names is not None:
+        return game_names
+    
+    semantic_index = get_semantic_index()
+    if semantic_index is None:
+        return None
+    match = semantic_index.lookup(normalize_prompt(prompt), count)
+    if match is None:
+        return None
+    
+    # The answer may have expired from the prompt cache since
+    game_names = prompt_cache.get(match[0])
+    if game_names is not None:
+        # Repeats of this exact prompt then skip the similarity search
+        prompt_cache.set(key, game_names)
+    return game_names
+
+def cache_recommendations(prompt, count, game_names):
+    """
+    Cache the game names Gemini recommended for a prompt
+    
+    Args:
+        prompt (str): User's prompt
+        count (int): Number of game recommendations requested
+        game_names (list): Recommended game names
+    """
+    key = prompt_cache_key(prompt, count)
+    get_prompt_cache().set(key, game_names)
+    semantic_index = get_semantic_index()
+    if semantic_index is not None:
+        semantic_index.add(normalize_prompt(prompt), count, key)
+
+def _build_config(count, grounded=True):
+    """
+    Build the generation config for a recommendation request
+    
+    Ungrounded calls ask for JSON constrained to an array of at most count
+    strings (unless GEMINI_STRUCTURED_OUTPUT=0), so the answer always
+    parses. Gemini does not allow that together with Google Search, so
+    grounded calls rely on the system instruction alone.
+    
+    Args:
+        count (int): Number of game recommendations to generate
+        grounded (bool): Enable Google Search grounding
+        
+    Returns:
+        GenerateContentConfig: Config with the system instruction, and Google Search grounding if asked
+    """
+    from google.genai import types
+    
     system_instruction = f"""
     You are a video game recommendation expert. When given a description or request,
     recommend exactly {count} video games that match the criteria.
@@ -41,54 +805,103 @@ def get_game_recommendations(prompt, count=4):
     IMPORTANT: Make sure to return ONLY valid complete JSON array of strings.
     """
     
-    try:
+    tools = []
+    if grounded:
         # Configure Google Search as a tool for grounding
-        google_search_tool = Tool(
-            google_search = GoogleSearch()
-        )
-        
-        # Make the request with Google Search grounding enabled
-        response = client.models.generate_content(
-            model='gemini-2.0-flash-exp',
-            contents=prompt,
-            config=GenerateContentConfig(
-                system_instruction=system_instruction,
-                temperature=0.7,
-                max_output_tokens=2048,
-                tools=[google_search_tool],  # Enable Google Search grounding
-            )
+        google_search_tool = types.Tool(
+            google_search = types.GoogleSearch()
         )
+        tools.append(google_search_tool)
+    
+    structured = not grounded and _structured_output_enabled()
+    return types.GenerateContentConfig(
+        system_instruction=system_instruction,
+        temperature=0.7,
+        max_output_tokens=2048,
+        tools=tools,
+        response_mime_type='application/json' if structured else None,
+        response_schema=types.Schema(
+            type=types.Type.ARRAY,
+            items=types.Schema(type=types.Type.STRING),
+            min_items=1,
+            max_items=count,
+        ) if structured else None,
+    )
+
+def _parse_game_names(response, count):
+    """
+    Extract the list of game names from a Gemini response
+    
+    Structured answers come already parsed. Otherwise the JSON array is
+    looked for in the text, and if it is broken (e.g. cut off by the token
+    limit), its complete names are kept.
+    
+    Args:
+        response (GenerateContentResponse): Response from Gemini
+        count (int): Maximum number of game names to keep
         
-        # Extract the text response
-        if response.candidates and response.candidates[0].content and response.candidates[0].content.parts:
-            # Get the text from the first part of the first candidate's content
-            response_text = response.candidates[0].content.parts[0].text
-            
-            # Parse the text as JSON - the system instruction tells the model to format as JSON
-            try:
-                # Find JSON array in the text (in case model includes explanatory text)
-                json_match = re.search(r'(\[[\s\S]*\])', response_text)
-                if json_match:
-                    json_text = json_match.group(1)
-                else:
-                    json_text = response_text
-                
-                # Parse the JSON array of game names
-                game_names = json.loads(json_text)
-                
-                # Ensure we have exactly 'count' games (or fewer if that's all we got)
-                if len(game_names) > count:
-                    game_names = game_names[:count]
-                    
-                return game_names
-            except json.JSONDecodeError as e:
-                print(f"Error parsing JSON from Gemini response: {e}")
-                print(f"Raw response: {response_text}")
-                return []
+    Returns:
+        list: List of strings containing recommended game names
+    """
+    # Structured output is parsed by the SDK against the response schema
+    game_names = _validate_game_names(response.parsed, count)
+    if game_names:
+        _count_parse('parsed')
+        return game_names
+    
+    # Extract the text response
+    response_text = _chunk_text(response)
+    if not response_text:
+        print("No valid candidates found in the response")
+        return []
+    
+    # Parse the text as JSON - the system instruction tells the model to format as JSON
+    try:
+        # Find JSON array in the text (in case model includes explanatory text)
+        json_match = re.search(r'(\[[\s\S]*\])', response_text)
+        if json_match:
+            json_text = json_match.group(1)
         else:
-            print("No valid candidates found in the response")
-            return []
-    except Exception as e:
-        # Log the error and return an empty list
-        print(f"Error getting recommendations from Gemini: {e}")
-        return []
\ No newline at end of file
+            json_text = response_text
+        
+        # Parse the JSON array of game names
+        game_names = _validate_game_names(json.loads(json_text), count)
+        if game_names:
+            _count_parse('parsed')
+            return game_names
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON from Gemini response: {e}")
+    
+    # Repair: keep every complete string of a truncated or malformed array
+    game_names = _validate_game_names(GameNameParser().feed(response_text), count)
+    if game_names:
+        _count_parse('repaired')
+    else:
+        print(f"Raw response: {response_text}")
+    return game_names
+
+def _validate_game_names(value, count, known_names=()):
+    """
+    Keep the valid game names of a parsed answer
+    
+    Args:
+        value: Parsed answer, expected to be a list of strings
+        count (int): Maximum number of game names, counting known_names
+        known_names (list): Names already accepted, which are not repeated
+        
+    Returns:
+        list: Non-empty, stripped, distinct game names, at most count - len(known_names)
+    """
+    if not isinstance(value, list):
+        return []
+    seen = {name.casefold() for name in known_names}
+    game_names = []
+    for game_name in value:
+        if not isinstance(game_name, str) or not game_name.strip():
+            continue
+        game_name = game_name.strip()
+        if game_name.casefold() in seen:
+            continue
+        seen.add(game_name.casefold())
+        game_names.append(game_name)
+    return game_names[:max(count - len(known_names), 0)]
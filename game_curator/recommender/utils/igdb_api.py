@@ -1,23 +1,134 @@
 import os
 import requests
+import httpx
 import json
+import re
 import time
+import unicodedata
+import copy
+import asyncio
+import threading
+import weakref
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from asgiref.sync import sync_to_async
+from .cache import get_cache
+from .rate_limiter import (
+    RateLimiter, PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_ENRICHMENT, PRIORITY_BACKGROUND,
+)
 
-# Load environment variables from .env file
-load_dotenv()
+# Maximum number of sub-queries IGDB accepts in one /multiquery request
+MULTIQUERY_LIMIT = 10
+
+# Ways get_game_details() can send its lookups to IGDB
+FETCH_MODES = ('sequential', 'concurrent', 'multiquery')
+
+# Fields fetched for every recommended game
+GAME_DETAIL_FIELDS = (
+    'name,summary,storyline,first_release_date,rating,'
+    'cover.url,screenshots.url,genres.name,platforms.name,involved_companies.company.name,'
+    'involved_companies.developer,involved_companies.publisher,'
+    'game_modes.name,themes.name,total_rating,total_rating_count,websites.url,websites.category,'
+    'alternative_names.name,dlcs,expansions,franchise,franchises,age_ratings.rating,age_ratings.category,'
+    'language_supports.language.name,language_supports.language.native_name,language_supports.language_support_type.name'
+)
+
+# Requests a lookup generator can yield (see _game_lookup_steps())
+_Query = namedtuple('_Query', 'endpoint query priority')
+_CacheGet = namedtuple('_CacheGet', 'cache key')
+_CacheSet = namedtuple('_CacheSet', 'cache key value ttl', defaults=(None,))
+_Call = namedtuple('_Call', 'fn args')
+
+# Edition suffixes that name the same game, e.g. "Skyrim Special Edition"
+EDITION_SUFFIX_RE = re.compile(
+    r'\s+(?:goty|(?:game of the year|goty|deluxe|digital deluxe|definitive|complete|ultimate|'
+    r'gold|standard|special|enhanced|anniversary|premium|legendary|collector s)\s+edition)$'
+)
+
+def get_game_cache():
+    """Get the cache of fully processed games keyed by IGDB id"""
+    return get_cache('game', ttl=24 * 3600, max_entries=1000)
+
+def get_title_index():
+    """
+    Get the index of normalized game titles to IGDB ids
+    
+    Values are {"game_id": id}, or {"game_id": None} for titles IGDB does
+    not know, which are kept for TITLE_CACHE_NEGATIVE_TTL seconds instead.
+    """
+    return get_cache('title', ttl=30 * 24 * 3600, max_entries=100000, backend='db')
+
+def get_franchise_cache():
+    """Get the cache of processed franchise timelines keyed by IGDB franchise id"""
+    return get_cache('franchise', ttl=7 * 24 * 3600, max_entries=10000, backend='db')
+
+def normalize_title(title):
+    """
+    Normalize a game title so trivially different spellings share an index entry
+    
+    Lowercases, strips accents, trademark signs and punctuation, and drops
+    edition suffixes, so "The Witcher® 3: Wild Hunt – Complete Edition"
+    becomes "the witcher 3 wild hunt".
+    
+    Args:
+        title (str): Game title
+        
+    Returns:
+        str: Normalized title
+    """
+    title = unicodedata.normalize('NFKD', title)
+    title = ''.join(char for char in title if not unicodedata.combining(char))
+    title = re.sub(r'[^0-9a-z]+', ' ', title.lower()).strip()
+    return EDITION_SUFFIX_RE.sub('', title)
 
 class IGDBClient:
-    """Client for interacting with the IGDB API"""
+    """
+    Client for interacting with the IGDB API
+
+    The client keeps a keep-alive connection pool and a single OAuth token, so
+    one instance is meant to be shared by every thread of a worker process
+    (see get_igdb_client()).
+    """
     
-    def __init__(self):
+    def __init__(self, pool_size=None, token_refresh_margin=None, rate_limiter=None):
         self.client_id = os.getenv('IGDB_CLIENT_ID')
         self.client_secret = os.getenv('IGDB_CLIENT_SECRET')
         self.access_token = None
         self.token_expiry = None
         self.base_url = "https://api.igdb.com/v4"
         
+        # Maximum number of keep-alive connections kept open per host
+        if pool_size is None:
+            pool_size = int(os.getenv('IGDB_POOL_SIZE', 10))
+        self.pool_size = pool_size
+        
+        # Refresh the token this many seconds before Twitch says it expires
+        if token_refresh_margin is None:
+            token_refresh_margin = int(os.getenv('IGDB_TOKEN_REFRESH_MARGIN', 3600))
+        self.token_refresh_margin = token_refresh_margin
+        
+        # Only one thread at a time may fetch a new token
+        self._token_lock = threading.Lock()
+        
+        # Keep every thread of the worker under IGDB's request limits together
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(
+                rate=float(os.getenv('IGDB_RATE_LIMIT', 4)),
+                max_open=int(os.getenv('IGDB_MAX_OPEN_REQUESTS', 8)),
+            )
+        self.rate_limiter = rate_limiter
+        
+        # Requests rejected with 429 are retried with exponential backoff
+        self.max_retries = int(os.getenv('IGDB_MAX_RETRIES', 3))
+        self.retry_backoff = float(os.getenv('IGDB_RETRY_BACKOFF', 0.5))
+        
+        # Reuse TCP+TLS connections to Twitch and IGDB across requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size)
+        self.session.mount('https://', adapter)
+        
     def _get_access_token(self):
         """Get a new access token from Twitch"""
         url = "https://id.twitch.tv/oauth2/token"
@@ -27,121 +138,1145 @@ class IGDBClient:
             "grant_type": "client_credentials"
         }
         
-        response = requests.post(url, params=params)
+        response = self.session.post(url, params=params)
         if response.status_code == 200:
             data = response.json()
+            # Set token expiry time (subtract the refresh margin for safety)
+            lifetime = max(data["expires_in"] - self.token_refresh_margin, 0)
+            self.token_expiry = datetime.now() + timedelta(seconds=lifetime)
             self.access_token = data["access_token"]
-            # Set token expiry time (subtract 1 hour for safety margin)
-            self.token_expiry = datetime.now() + timedelta(seconds=data["expires_in"] - 3600)
             return True
         else:
             print(f"Failed to get access token: {response.status_code} - {response.text}")
             return False
     
+    def warm_up(self):
+        """
+        Fetch the access token and open a pooled connection to IGDB ahead of the first request
+        
+        Returns:
+            bool: Whether IGDB answered
+        """
+        return self.make_request('games', 'fields id; limit 1;', PRIORITY_BACKGROUND) is not None
+    
+    def _token_is_valid(self):
+        """Check whether the current access token can still be used"""
+        return bool(self.access_token and self.token_expiry and datetime.now() < self.token_expiry)
+    
     def _ensure_valid_token(self):
         """Ensure we have a valid access token"""
-        if not self.access_token or not self.token_expiry or datetime.now() >= self.token_expiry:
+        if self._token_is_valid():
+            return True
+        
+        with self._token_lock:
+            # Another thread may have refreshed the token while we were waiting
+            if self._token_is_valid():
+                return True
             return self._get_access_token()
-        return True
     
-    def make_request(self, endpoint, query):
-        """Make a request to the IGDB API"""
-        if not self._ensure_valid_token():
-            return None
+    def _invalidate_token(self, token):
+        """Drop a token rejected by IGDB unless another thread already replaced it"""
+        with self._token_lock:
+            if self.access_token == token:
+                self.access_token = None
+                self.token_expiry = None
+    
+    def make_request(self, endpoint, query, priority=PRIORITY_NORMAL):
+        """
+        Make a request to the IGDB API
         
+        Args:
+            endpoint (str): IGDB endpoint, e.g. "games"
+            query (str): Apicalypse query body
+            priority (int): Queue priority from utils.rate_limiter, lowest first
+            
+        Returns:
+            list: Parsed JSON response, or None if the request failed
+        """
         url = f"{self.base_url}/{endpoint}"
-        headers = {
-            "Client-ID": self.client_id,
-            "Authorization": f"Bearer {self.access_token}"
-        }
+        token_refreshed = False
         
-        try:
-            response = requests.post(url, headers=headers, data=query)
+        for attempt in range(self.max_retries + 1):
+            if not self._ensure_valid_token():
+                return None
+            
+            token = self.access_token
+            headers = {
+                "Client-ID": self.client_id,
+                "Authorization": f"Bearer {token}"
+            }
+            
+            try:
+                with self.rate_limiter.slot(priority):
+                    response = self.session.post(url, headers=headers, data=query)
+            except Exception as e:
+                print(f"Error making IGDB API request: {e}")
+                return None
+            
             if response.status_code == 200:
                 return response.json()
+            elif response.status_code == 401 and not token_refreshed:
+                # Retry once with a fresh token if IGDB revoked the current one early
+                token_refreshed = True
+                self._invalidate_token(token)
+            elif response.status_code == 429 and attempt < self.max_retries:
+                self.rate_limiter.throttled()
+                time.sleep(self.retry_backoff * 2 ** attempt)
             else:
                 print(f"IGDB API request failed: {response.status_code} - {response.text}")
                 return None
-        except Exception as e:
-            print(f"Error making IGDB API request: {e}")
-            return None
+        
+        return None
+
+    def multiquery(self, queries, executor=None, priority=PRIORITY_NORMAL):
+        """
+        Send several named queries through IGDB's /multiquery endpoint
+
+        IGDB accepts at most MULTIQUERY_LIMIT sub-queries per request, so larger
+        batches are split into chunks that run on the executor when one is given.
+
+        Args:
+            queries (list): (name, endpoint, query) tuples; names must be unique
+            executor (ThreadPoolExecutor): Pool used to send chunks side by side
+            priority (int): Queue priority from utils.rate_limiter, lowest first
+
+        Returns:
+            dict: Result list for each query name. Queries whose chunk failed are missing.
+        """
+        chunks = [queries[i:i + MULTIQUERY_LIMIT] for i in range(0, len(queries), MULTIQUERY_LIMIT)]
+        futures = []
+        for chunk in chunks:
+            body = ''.join(
+                f'query {endpoint} "{name}" {{ {query} }};\n'
+                for name, endpoint, query in chunk
+            )
+            futures.append(_submit(executor, self.make_request, "multiquery", body, priority))
+
+        results = {}
+        for future in futures:
+            for item in future.result() or []:
+                results[item['name']] = item.get('result')
+        return results
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+# Process-wide client shared by every request handled by this worker
+_client = None
+_client_lock = threading.Lock()
+
+def get_igdb_client():
+    """
+    Get the shared IGDB client for this process, creating it on first use
+    
+    Returns:
+        IGDBClient: Long-lived client with a pooled session and cached token
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = IGDBClient()
+    return _client
+
+class AsyncIGDBClient:
+    """
+    Async client for the IGDB API, used by the async views
+
+    The OAuth token is borrowed from the shared sync IGDBClient so sync and
+    async code never fetch separate tokens.
+    """
+    
+    def __init__(self, token_client=None, pool_size=None):
+        self.token_client = token_client or get_igdb_client()
+        self.base_url = self.token_client.base_url
+        
+        if pool_size is None:
+            pool_size = self.token_client.pool_size
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.http = httpx.AsyncClient(limits=limits, timeout=30)
+        # Task closing the client with its event loop (see get_async_igdb_client())
+        self.closer = None
+    
+    async def _ensure_valid_token(self):
+        """Ensure the shared client has a valid access token"""
+        if self.token_client._token_is_valid():
+            return True
+        # Token fetches are rare, so run the sync refresh in a thread
+        return await asyncio.to_thread(self.token_client._ensure_valid_token)
+    
+    async def make_request(self, endpoint, query, priority=PRIORITY_NORMAL):
+        """
+        Make a request to the IGDB API
+        
+        Args:
+            endpoint (str): IGDB endpoint, e.g. "games"
+            query (str): Apicalypse query body
+            priority (int): Queue priority from utils.rate_limiter, lowest first
+            
+        Returns:
+            list: Parsed JSON response, or None if the request failed
+        """
+        url = f"{self.base_url}/{endpoint}"
+        rate_limiter = self.token_client.rate_limiter
+        max_retries = self.token_client.max_retries
+        token_refreshed = False
+        
+        for attempt in range(max_retries + 1):
+            if not await self._ensure_valid_token():
+                return None
+            
+            token = self.token_client.access_token
+            headers = {
+                "Client-ID": self.token_client.client_id,
+                "Authorization": f"Bearer {token}"
+            }
+            
+            try:
+                async with rate_limiter.async_slot(priority):
+                    response = await self.http.post(url, headers=headers, content=query)
+            except Exception as e:
+                print(f"Error making IGDB API request: {e}")
+                return None
+            
+            if response.status_code == 200:
+                return response.json()
+            elif response.status_code == 401 and not token_refreshed:
+                # Retry once with a fresh token if IGDB revoked the current one early
+                token_refreshed = True
+                self.token_client._invalidate_token(token)
+            elif response.status_code == 429 and attempt < max_retries:
+                rate_limiter.throttled()
+                await asyncio.sleep(self.token_client.retry_backoff * 2 ** attempt)
+            else:
+                print(f"IGDB API request failed: {response.status_code} - {response.text}")
+                return None
+        
+        return None
+    
+    async def multiquery(self, queries, priority=PRIORITY_NORMAL):
+        """
+        Send several named queries through IGDB's /multiquery endpoint
+        
+        Args:
+            queries (list): (name, endpoint, query) tuples; names must be unique
+            priority (int): Queue priority from utils.rate_limiter, lowest first
+            
+        Returns:
+            dict: Result list for each query name. Queries whose chunk failed are missing.
+        """
+        chunks = [queries[i:i + MULTIQUERY_LIMIT] for i in range(0, len(queries), MULTIQUERY_LIMIT)]
+        responses = await asyncio.gather(*(
+            self.make_request("multiquery", ''.join(
+                f'query {endpoint} "{name}" {{ {query} }};\n'
+                for name, endpoint, query in chunk
+            ), priority)
+            for chunk in chunks
+        ))
+        
+        results = {}
+        for response in responses:
+            for item in response or []:
+                results[item['name']] = item.get('result')
+        return results
+    
+    async def aclose(self):
+        """Close all pooled connections"""
+        await self.http.aclose()
+
+# One async client per event loop, since httpx connections are bound to the
+# loop that opened them
+_async_clients = weakref.WeakKeyDictionary()
+
+def get_async_igdb_client():
+    """
+    Get the shared async IGDB client for the running event loop
+    
+    Under an ASGI server the loop, and so the client, lives as long as the
+    worker. Under WSGI (and runserver) Django runs each async view in a new
+    loop, and the client is closed when that loop ends.
+    
+    Returns:
+        AsyncIGDBClient: Async client with a pooled connection
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncIGDBClient()
+        _async_clients[loop] = client
+        # Keep a reference, the loop only holds weak references to its tasks
+        client.closer = loop.create_task(_close_when_loop_ends(loop, client))
+    return client
+
+async def _close_when_loop_ends(loop, client):
+    """
+    Close an async client once its event loop shuts down
+    
+    asyncio.run(), which both uvicorn and Django's per-view loops use,
+    cancels the tasks still pending when it finishes and lets them clean up.
+    
+    Args:
+        loop (AbstractEventLoop): Loop the client belongs to
+        client (AsyncIGDBClient): Client to close
+    """
+    try:
+        await loop.create_future()
+    finally:
+        _async_clients.pop(loop, None)
+        await client.aclose()
+
+# Thread pools used by the concurrent fetch mode. Games and the lookups they
+# fan out to get separate pools so a game waiting on its lookups can never
+# starve those lookups of workers.
+_game_executor = None
+_lookup_executor = None
+_executor_lock = threading.Lock()
+
+def _get_executors():
+    """
+    Get the shared thread pools for concurrent IGDB lookups, creating them on first use
+    
+    Returns:
+        tuple: (game_executor, lookup_executor)
+    """
+    global _game_executor, _lookup_executor
+    if _game_executor is None:
+        with _executor_lock:
+            if _game_executor is None:
+                max_workers = int(os.getenv('IGDB_MAX_WORKERS', 8))
+                _lookup_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='igdb-lookup')
+                _game_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='igdb-game')
+    return _game_executor, _lookup_executor
+
+def _submit(executor, fn, *args):
+    """
+    Run a function on the executor, or right away when no executor is given
+    
+    Args:
+        executor (ThreadPoolExecutor): Pool to run on, or None to run sequentially
+        fn (callable): Function to call
+        *args: Arguments for the function
+        
+    Returns:
+        Future: Future holding the function's result
+    """
+    if executor is not None:
+        return executor.submit(_run_in_pool, fn, *args)
+    
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def _run_in_pool(fn, *args):
+    """
+    Run a function on a pool thread, closing its database connections around it
+    
+    The db cache backends and the catalog mirror query the database from
+    these threads, which Django does not manage like request threads, so
+    connections are closed before and after each task as Django does around
+    each request.
+    """
+    from django.db import close_old_connections
+    close_old_connections()
+    try:
+        return fn(*args)
+    finally:
+        close_old_connections()
 
-def get_game_details(game_names):
+def _get_fetch_mode(mode):
+    """Resolve and validate the fetch mode for get_game_details()"""
+    if mode is None:
+        mode = os.getenv('IGDB_FETCH_MODE', 'multiquery')
+    if mode not in FETCH_MODES:
+        raise ValueError(f"Unknown IGDB fetch mode: {mode}")
+    return mode
+
+def _split_main_and_similar(games):
+    """Build the get_game_details() result from per-name lookups"""
+    return {
+        "main_game": games[0],
+        "similar_games": [game for game in games[1:] if game]
+    }
+
+def get_game_details(game_names, mode=None, core=False):
     """
     Get detailed information about games from IGDB API
     
     Args:
         game_names (list): List of game names to search for
+        mode (str): How lookups are sent to IGDB. One of FETCH_MODES; defaults
+            to the IGDB_FETCH_MODE environment variable ("multiquery").
+        core (bool): Skip the add-on and franchise lookups; the page loads
+            those sections on demand (see get_game_add_ons())
         
     Returns:
         dict: Dictionary containing main game and similar games details
     """
-    client = IGDBClient()
+    client = get_igdb_client()
     
     if not game_names or len(game_names) == 0:
         return {"main_game": None, "similar_games": []}
     
-    main_game_name = game_names[0]
-    similar_game_names = game_names[1:] if len(game_names) > 1 else []
+    mode = _get_fetch_mode(mode)
     
-    # Get detailed information for the main game
-    main_game = _search_and_get_game_details(client, main_game_name)
+    if mode == 'sequential':
+        game_executor, lookup_executor = None, None
+    else:
+        game_executor, lookup_executor = _get_executors()
     
-    # Get detailed information for similar games
-    similar_games = []
-    for game_name in similar_game_names:
-        game = _search_and_get_game_details(client, game_name)
-        if game:
-            similar_games.append(game)
+    if mode == 'multiquery':
+        games = _get_game_details_batched(client, game_names, lookup_executor, core)
+    else:
+        # Start every game at once; results are collected in the original order
+        futures = [
+            _submit(game_executor, _search_and_get_game_details, client, game_name, lookup_executor,
+                    _lookup_priority(index), core)
+            for index, game_name in enumerate(game_names)
+        ]
+        games = [future.result() for future in futures]
     
-    return {
-        "main_game": main_game,
-        "similar_games": similar_games
-    }
+    return _split_main_and_similar(games)
 
-def _search_and_get_game_details(client, game_name):
+async def aget_game_details(game_names, mode=None, core=False):
     """
-    Search for a game by name and get its detailed information
+    Async version of get_game_details()
+    
+    Args:
+        game_names (list): List of game names to search for, or an async
+            iterator of names (see aiter_game_details())
+        mode (str): How lookups are sent to IGDB. One of FETCH_MODES; defaults
+            to the IGDB_FETCH_MODE environment variable ("multiquery").
+        core (bool): Skip the add-on and franchise lookups
+        
+    Returns:
+        dict: Dictionary containing main game and similar games details
+    """
+    games = {}
+    async for index, game in aiter_game_details(game_names, mode, core):
+        games[index] = game
+    
+    if not games:
+        return {"main_game": None, "similar_games": []}
+    return _split_main_and_similar([games[index] for index in sorted(games)])
+
+async def aiter_game_details(game_names, mode=None, core=False):
+    """
+    Look up games and yield each one as soon as its details are ready
+    
+    The names can also come from an async iterator, such as
+    gemini_api.aiter_game_recommendations(). Each name is then looked up as
+    soon as it arrives, while the next ones are still being generated.
+    
+    Args:
+        game_names (list): List of game names to search for, or an async
+            iterator of names
+        mode (str): How lookups are sent to IGDB. One of FETCH_MODES; defaults
+            to the IGDB_FETCH_MODE environment variable ("multiquery").
+        core (bool): Skip the add-on and franchise lookups
+        
+    Yields:
+        tuple: (index of the name in game_names, detailed game information or
+            None if not found), in the order the lookups finish
+    """
+    client = get_async_igdb_client()
+    mode = _get_fetch_mode(mode)
+    names = _NameFeed(game_names)
+    
+    try:
+        if mode == 'multiquery':
+            async for index, game in _aiter_game_details_batched(client, names, core):
+                yield index, game
+        elif mode == 'concurrent':
+            async def lookup(index, game_name):
+                return index, await _asearch_and_get_game_details(client, game_name, _lookup_priority(index), core)
+            
+            tasks = set()
+            taking = None
+            try:
+                while tasks or not names.done:
+                    # Wait for whichever comes first: a finished lookup or new names
+                    if taking is None and not names.done:
+                        taking = asyncio.ensure_future(names.take(wait=True))
+                    waiting = tasks | {taking} if taking else tasks
+                    done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                    
+                    if taking in done:
+                        for index, game_name in taking.result():
+                            tasks.add(asyncio.ensure_future(lookup(index, game_name)))
+                        taking = None
+                    for task in done & tasks:
+                        tasks.discard(task)
+                        yield task.result()
+            finally:
+                # The consumer may stop early, e.g. when the client disconnects
+                for task in tasks:
+                    task.cancel()
+                if taking:
+                    taking.cancel()
+        else:
+            while not names.done:
+                for index, game_name in await names.take(wait=True):
+                    yield index, await _asearch_and_get_game_details(client, game_name, _lookup_priority(index), core)
+    finally:
+        names.close()
+
+# Marks the end of the names in a _NameFeed
+_END_OF_NAMES = object()
+
+class _NameFeed:
+    """
+    Game names collected in the background from a list or an async iterator
+    
+    Lets the async fetch modes start lookups for the names that have
+    arrived while more are still on their way.
+    """
+    
+    def __init__(self, game_names):
+        self.done = False
+        self._count = 0
+        self._error = None
+        self._queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._collect(game_names))
+    
+    async def _collect(self, game_names):
+        try:
+            if hasattr(game_names, '__aiter__'):
+                async for game_name in game_names:
+                    self._queue.put_nowait(game_name)
+            else:
+                for game_name in game_names or []:
+                    self._queue.put_nowait(game_name)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._queue.put_nowait(_END_OF_NAMES)
+    
+    async def take(self, wait):
+        """
+        Take the names that arrived since the last call
+        
+        Args:
+            wait (bool): Wait for at least one name (or the end) if none has arrived
+            
+        Returns:
+            list: (index, name) tuples, numbered in arrival order
+        """
+        items = []
+        if wait and not self.done and self._queue.empty():
+            items.append(await self._queue.get())
+        while not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        
+        names = []
+        for item in items:
+            if item is _END_OF_NAMES:
+                self.done = True
+                if self._error is not None:
+                    raise self._error
+            else:
+                names.append((self._count, item))
+                self._count += 1
+        return names
+    
+    def close(self):
+        """Stop collecting names"""
+        self._task.cancel()
+
+def _lookup_priority(index):
+    """Queue priority for the lookup of the game at this position of a recommendation"""
+    return PRIORITY_INTERACTIVE if index == 0 else PRIORITY_NORMAL
+
+def _game_lookup_steps(game_name, priority=PRIORITY_NORMAL, core=False):
+    """
+    Look up one game by name, one batch of independent requests at a time
+    
+    This generator holds the lookup logic shared by every fetch mode. Each
+    yield is a dict of {key: request} for requests that can run side by side,
+    where a request is an IGDB _Query, a _CacheGet/_CacheSet, or a _Call
+    to a local (database) function, and the driver sends back a dict of {key: result}. The driver decides how the
+    queries are sent (one by one, in parallel, or through /multiquery) and
+    whether it is sync or async.
     
     Args:
-        client (IGDBClient): IGDB API client
         game_name (str): Name of the game to search for
+        priority (int): Queue priority for the search and details queries;
+            the enrichment queries always use PRIORITY_ENRICHMENT
+        core (bool): Stop after the details and time-to-beat, leaving out
+            add-ons and franchise. Such games are cached under core_cache_key().
         
     Returns:
-        dict: Detailed game information or None if not found
+        dict: Detailed game information or None if not found (as the
+            generator's return value)
     """
-    # First, search for the game to get its ID
-    search_query = f'search "{game_name}"; fields name,id; limit 1;'
-    search_results = client.make_request("games", search_query)
+    # Titles seen before resolve to their ID without a search
+    title_index = get_title_index()
+    game_cache = get_game_cache()
+    title = normalize_title(game_name)
+    results = yield {'title': _CacheGet(title_index, title)}
+    resolved = results['title']
     
-    if not search_results or len(search_results) == 0:
-        return None
+    game_id = None
+    if resolved is not None:
+        game_id = resolved['game_id']
+        if game_id is None:
+            return None
+        
+        # Popular games are served from the cache without touching IGDB again
+        results = yield _cached_game_requests(game_cache, game_id, core)
+        cached = _cached_game(results)
+        if cached is not None:
+            return cached
     
-    game_id = search_results[0]['id']
-    
-    # Get detailed information for the game with a focused set of fields
-    details_query = (
-        f'where id = {game_id}; fields name,summary,storyline,first_release_date,rating,'
-        f'cover.url,screenshots.url,genres.name,platforms.name,involved_companies.company.name,'
-        f'involved_companies.developer,involved_companies.publisher,'
-        f'game_modes.name,themes.name,total_rating,total_rating_count,websites.url,websites.category,'
-        f'alternative_names.name,dlcs,expansions,franchise,franchises,age_ratings.rating,age_ratings.category,'
-        f'language_supports.language.name,language_supports.language.native_name,language_supports.language_support_type.name;'
-        f'limit 1;'
-    )
+    # The local catalog mirror answers without any IGDB request
+    if catalog_mirror_enabled():
+        from .igdb_catalog import get_mirrored_game
+        results = yield {'mirror': _Call(get_mirrored_game, (game_id, game_name))}
+        game = results['mirror']
+        if game is not None:
+            yield _store_requests(title_index, game_cache, game_name, game)
+            return game
     
-    game_details = client.make_request("games", details_query)
+    if game_id is None:
+        # First, search for the game to get its ID
+        results = yield {'search': _Query("games", _search_query(game_name), priority)}
+        search_results = results['search']
+        
+        if search_results is None:
+            # The search failed, which says nothing about whether the game exists
+            return None
+        
+        if len(search_results) == 0:
+            # Remember the miss for a shorter time, IGDB may add the game later
+            negative_ttl = int(os.getenv('TITLE_CACHE_NEGATIVE_TTL', 24 * 3600))
+            yield {'title': _CacheSet(title_index, title, {'game_id': None}, negative_ttl)}
+            return None
+        
+        game_id = search_results[0]['id']
+        
+        results = yield _cached_game_requests(game_cache, game_id, core)
+        cached = _cached_game(results)
+        if cached is not None:
+            return cached
+    
+    # Time-to-beat only needs the ID, so fetch it alongside the details
+    results = yield {
+        'details': _Query("games", _details_query(game_id), priority),
+        'time_to_beat': _Query("game_time_to_beats", _time_to_beat_query(game_id), PRIORITY_ENRICHMENT),
+    }
+    game_details = results['details']
     
     if not game_details or len(game_details) == 0:
         return None
-        
+    
     game = game_details[0]
+    # Games missing data because a query failed are not cached
+    partial = results['time_to_beat'] is None
     
     # Get time-to-beat data
-    time_to_beat = _get_time_to_beat(client, game_id)
+    time_to_beat = _process_time_to_beat(results['time_to_beat'])
     if time_to_beat:
         game['time_to_beat'] = time_to_beat
     
+    _process_game_details(game)
+    
+    if core:
+        yield _store_requests(title_index, game_cache, game_name, game, core, partial)
+        return game
+    
+    add_on_ids = _get_add_on_ids(game)
+    franchise_id = _get_franchise_id(game)
+    
+    # Every game of a franchise shares its timeline, so it is cached on its own
+    franchise_cache = get_franchise_cache()
+    franchise = None
+    if franchise_id:
+        results = yield {'franchise': _CacheGet(franchise_cache, franchise_id)}
+        franchise = results['franchise']
+    
+    # Add-ons and franchise are independent, so fetch them side by side
+    queries = {}
+    if add_on_ids:
+        queries['add_ons'] = _Query("games", _add_on_query(add_on_ids), PRIORITY_ENRICHMENT)
+    if franchise_id and franchise is None:
+        queries['franchise'] = _Query("franchises", _franchise_query(franchise_id), PRIORITY_ENRICHMENT)
+    results = (yield queries) if queries else {}
+    partial = partial or any(results[key] is None for key in queries)
+    
+    game['add_on_details'] = _process_add_ons(results.get('add_ons'))
+    
+    franchise_results = results.get('franchise')
+    franchise_failed = False
+    if franchise_results:
+        franchise = franchise_results[0]
+        franchise_games = None
+        if 'games' in franchise and franchise['games']:
+            results = yield {
+                'franchise_games': _Query("games", _franchise_games_query(franchise['games']), PRIORITY_ENRICHMENT)
+            }
+            franchise_games = results['franchise_games']
+            franchise_failed = franchise_games is None
+        franchise = _process_franchise(franchise, franchise_games)
+    game['franchise_details'] = franchise
+    
+    store = _store_requests(title_index, game_cache, game_name, game, partial=partial or franchise_failed)
+    if franchise_results and not franchise_failed:
+        store['franchise'] = _CacheSet(franchise_cache, franchise_id, franchise)
+    yield store
+    
+    return game
+
+def _store_requests(title_index, game_cache, game_name, game, core=False, partial=False):
+    """
+    Build the cache writes that remember a finished lookup
+    
+    Every name the game is known by, including the one we searched for,
+    is indexed so the next lookup skips the search. The game itself is
+    only cached when every query for it succeeded.
+    
+    Args:
+        title_index (TTLCache): Cache from get_title_index()
+        game_cache (TTLCache): Cache from get_game_cache()
+        game_name (str): Name the game was looked up by
+        game (dict): Processed game
+        core (bool): Whether the game is missing its add-ons and franchise
+        partial (bool): Whether a query for the game failed, leaving it
+            without some of its data
+        
+    Returns:
+        dict: _CacheSet requests keyed by name
+    """
+    titles = {normalize_title(name) for name in [game_name, game.get('name', '')] + game['alt_names']}
+    store = {
+        f"title:{title}": _CacheSet(title_index, title, {'game_id': game['id']})
+        for title in titles if title
+    }
+    if not partial:
+        store['game'] = _CacheSet(game_cache, core_cache_key(game['id']) if core else game['id'], game)
+    return store
+
+def core_cache_key(game_id):
+    """Game cache key of a game looked up without its add-ons and franchise"""
+    return f"core:{game_id}"
+
+def _cached_game_requests(game_cache, game_id, core):
+    """
+    Build the cache reads for a game that is already known by ID
+    
+    A complete game is always good enough; core lookups also accept a core entry.
+    """
+    requests = {'cached': _CacheGet(game_cache, game_id)}
+    if core:
+        requests['cached_core'] = _CacheGet(game_cache, core_cache_key(game_id))
+    return requests
+
+def _cached_game(results):
+    """Pick the cached game from the results of _cached_game_requests()"""
+    if results['cached'] is not None:
+        return results['cached']
+    return results.get('cached_core')
+
+def get_game_by_id(game_id):
+    """
+    Get a processed game by its IGDB ID, for loading the sections of a game card on demand
+    
+    Games from a recommendation are normally still cached. Otherwise the
+    game is fetched like a core lookup and cached as one.
+    
+    Args:
+        game_id (int): IGDB ID of the game
+        
+    Returns:
+        dict: Detailed game information (possibly without add-ons and
+            franchise) or None if not found
+    """
+    game_cache = get_game_cache()
+    game = game_cache.get(game_id) or game_cache.get(core_cache_key(game_id))
+    if game is not None:
+        return game
+    
+    if catalog_mirror_enabled():
+        from .igdb_catalog import get_mirrored_game
+        game = get_mirrored_game(game_id)
+        if game is not None:
+            game_cache.set(game_id, game)
+            return game
+    
+    client = get_igdb_client()
+    results = client.multiquery([
+        ('details', "games", _details_query(game_id)),
+        ('time_to_beat', "game_time_to_beats", _time_to_beat_query(game_id)),
+    ], priority=PRIORITY_INTERACTIVE)
+    if not results.get('details'):
+        return None
+    
+    game = results['details'][0]
+    time_to_beat = _process_time_to_beat(results.get('time_to_beat'))
+    if time_to_beat:
+        game['time_to_beat'] = time_to_beat
+    _process_game_details(game)
+    game_cache.set(core_cache_key(game_id), game)
+    return game
+
+def get_game_add_ons(game):
+    """
+    Get the DLCs and expansions of a game from get_game_by_id()
+    
+    Add-ons fetched here are written back to the game's core cache entry,
+    so opening the section again costs no request.
+    
+    Args:
+        game (dict): Processed game
+        
+    Returns:
+        list: Detailed add-on information
+    """
+    if 'add_on_details' in game:
+        return game['add_on_details']
+    
+    add_ons = _get_add_on_details(get_igdb_client(), _get_add_on_ids(game), PRIORITY_INTERACTIVE)
+    get_game_cache().set(core_cache_key(game['id']), {**game, 'add_on_details': add_ons})
+    return add_ons
+
+def get_game_franchise(game):
+    """
+    Get the franchise timeline of a game from get_game_by_id()
+    
+    Args:
+        game (dict): Processed game
+        
+    Returns:
+        dict: Detailed franchise information or None if the game has none
+    """
+    if 'franchise_details' in game:
+        return game['franchise_details']
+    
+    franchise_id = _get_franchise_id(game)
+    if not franchise_id:
+        return None
+    return _get_franchise_details(get_igdb_client(), franchise_id, PRIORITY_INTERACTIVE)
+
+def catalog_mirror_enabled():
+    """Whether lookups should try the local IGDB catalog mirror before the live API"""
+    return os.getenv('IGDB_CATALOG_MIRROR', '0') == '1'
+
+def _advance(steps, results):
+    """
+    Send results to a lookup generator and get its next requests
+    
+    Args:
+        steps (generator): Generator from _game_lookup_steps()
+        results (dict): Results for the previous requests, or None to start
+        
+    Returns:
+        tuple: (requests, None) while running, or (None, game) once finished
+    """
+    try:
+        return steps.send(results), None
+    except StopIteration as stop:
+        return None, stop.value
+
+def _search_and_get_game_details(client, game_name, executor=None, priority=PRIORITY_NORMAL, core=False):
+    """
+    Search for a game by name and get its detailed information
+    
+    Args:
+        client (IGDBClient): IGDB API client
+        game_name (str): Name of the game to search for
+        executor (ThreadPoolExecutor): Pool used to run independent lookups
+            side by side, or None to run them one after another
+        priority (int): Queue priority for the search and details queries
+        core (bool): Skip the add-on and franchise lookups
+        
+    Returns:
+        dict: Detailed game information or None if not found
+    """
+    steps = _game_lookup_steps(game_name, priority, core)
+    results = None
+    while True:
+        requests, game = _advance(steps, results)
+        if requests is None:
+            return game
+        
+        futures = {}
+        for key, request in requests.items():
+            if isinstance(request, _Query):
+                futures[key] = _submit(executor, client.make_request, *request)
+            else:
+                futures[key] = _submit(None, _run_local_request, request)
+        results = {key: future.result() for key, future in futures.items()}
+
+async def _asearch_and_get_game_details(client, game_name, priority=PRIORITY_NORMAL, core=False):
+    """
+    Async version of _search_and_get_game_details()
+    
+    Args:
+        client (AsyncIGDBClient): Async IGDB API client
+        game_name (str): Name of the game to search for
+        priority (int): Queue priority for the search and details queries
+        core (bool): Skip the add-on and franchise lookups
+        
+    Returns:
+        dict: Detailed game information or None if not found
+    """
+    steps = _game_lookup_steps(game_name, priority, core)
+    results = None
+    while True:
+        requests, game = _advance(steps, results)
+        if requests is None:
+            return game
+        
+        keys = list(requests)
+        responses = await asyncio.gather(*(_arun_request(client, requests[key]) for key in keys))
+        results = dict(zip(keys, responses))
+
+def _run_local_request(request):
+    """Run a _CacheGet, _CacheSet or _Call request"""
+    if isinstance(request, _Call):
+        return request.fn(*request.args)
+    if isinstance(request, _CacheGet):
+        return request.cache.get(request.key)
+    request.cache.set(request.key, request.value, request.ttl)
+    return None
+
+async def _arun_request(client, request):
+    """Run any request yielded by a lookup generator from async code"""
+    if isinstance(request, _Query):
+        return await client.make_request(*request)
+    if isinstance(request, _Call):
+        return await sync_to_async(request.fn)(*request.args)
+    if isinstance(request, _CacheGet):
+        return await request.cache.aget(request.key)
+    await request.cache.aset(request.key, request.value, request.ttl)
+    return None
+
+def _get_game_details_batched(client, game_names, executor=None, core=False):
+    """
+    Get detailed information for several games using /multiquery batches
+    
+    All lookups advance in lockstep, and the queries each step needs for
+    every game go out together, so a whole recommendation costs one round
+    trip per step instead of about five requests per game. Cache reads and
+    writes in between cost no round trip.
+    
+    Args:
+        client (IGDBClient): IGDB API client
+        game_names (list): List of game names to search for
+        executor (ThreadPoolExecutor): Pool used to send oversized batches side by side
+        core (bool): Skip the add-on and franchise lookups
+        
+    Returns:
+        list: Detailed game information (or None) for each name, in the same order
+    """
+    games = [None] * len(game_names)
+    lookups = {
+        index: _game_lookup_steps(game_name, _lookup_priority(index), core)
+        for index, game_name in enumerate(game_names)
+    }
+    pending = _advance_all(lookups, dict.fromkeys(lookups), games)
+    
+    while pending:
+        ready = _next_ready(pending)
+        batch, names, priority = _batch_queries(ready)
+        responses = client.multiquery(batch, executor, priority) if batch else {}
+        cache_results = {
+            (index, key): _run_local_request(request)
+            for index, key, request in _local_requests(ready)
+        }
+        results = _split_results(ready, names, responses, cache_results)
+        pending.update(_advance_all(lookups, results, games))
+    
+    return games
+
+async def _aiter_game_details_batched(client, name_feed, core=False):
+    """
+    Async version of _get_game_details_batched() that yields each game as soon as its lookup finishes
+    
+    Names that arrive while a step is in flight join the lookups at the
+    next step, so their queries share the following batches.
+    
+    Args:
+        client (AsyncIGDBClient): Async IGDB API client
+        name_feed (_NameFeed): Names to search for
+        core (bool): Skip the add-on and franchise lookups
+        
+    Yields:
+        tuple: (index of the name, detailed game information or None)
+    """
+    games = {}
+    lookups = {}
+    pending = {}
+    
+    while True:
+        # Start the lookups of new names, waiting for some when nothing else is left to do
+        for index, game_name in await name_feed.take(wait=not pending):
+            lookups[index] = _game_lookup_steps(game_name, _lookup_priority(index), core)
+            pending.update(_advance_all(lookups, {index: None}, games))
+        
+        # Hand out the games whose lookup finished
+        for index in sorted(games):
+            yield index, games.pop(index)
+        if not pending:
+            if name_feed.done:
+                break
+            continue
+        
+        ready = _next_ready(pending)
+        batch, names, priority = _batch_queries(ready)
+        responses = await client.multiquery(batch, priority) if batch else {}
+        local_requests = _local_requests(ready)
+        local_values = await asyncio.gather(*(_arun_request(client, request) for _, _, request in local_requests))
+        cache_results = {
+            (index, key): value
+            for (index, key, _request), value in zip(local_requests, local_values)
+        }
+        results = _split_results(ready, names, responses, cache_results)
+        pending.update(_advance_all(lookups, results, games))
+
+def _next_ready(pending):
+    """
+    Pick the lookups whose requests go out next, removing them from `pending`
+    
+    Lookups that only need the cache or database go first, on their own, so that every
+    IGDB batch carries the queries of as many games as possible.
+    
+    Args:
+        pending (dict): Requests of each waiting lookup, keyed by game index
+        
+    Returns:
+        dict: Requests to run now, keyed by game index
+    """
+    ready = {
+        index: requests for index, requests in pending.items()
+        if not any(isinstance(request, _Query) for request in requests.values())
+    } or dict(pending)
+    for index in ready:
+        del pending[index]
+    return ready
+
+def _advance_all(lookups, results, games):
+    """
+    Advance each lookup that has results by one step
+    
+    Finished lookups are removed from `lookups` and their game is stored in `games`.
+    
+    Args:
+        lookups (dict): Running lookup generators keyed by game index
+        results (dict): Results for each lookup's previous requests (None to
+            start it), keyed by game index
+        games (list): Finished games, indexed like the game names (or a dict keyed by index)
+        
+    Returns:
+        dict: Next requests of each advanced lookup still running, keyed by game index
+    """
+    pending = {}
+    for index, lookup_results in results.items():
+        steps = lookups[index]
+        requests, game = _advance(steps, lookup_results)
+        if requests is None:
+            games[index] = game
+            del lookups[index]
+        else:
+            pending[index] = requests
+    return pending
+
+def _batch_queries(pending):
+    """
+    Merge the queries of several lookups into one multiquery batch
+    
+    Identical queries (e.g. the same franchise for two games) are sent once.
+    
+    Args:
+        pending (dict): Requests of each lookup, keyed by game index
+        
+    Returns:
+        tuple: (list of (name, endpoint, query), dict mapping (endpoint, query)
+            to its name, priority of the most urgent query in the batch)
+    """
+    batch = []
+    names = {}
+    batch_priority = None
+    for index, requests in pending.items():
+        for key, request in requests.items():
+            if not isinstance(request, _Query):
+                continue
+            endpoint, query, priority = request
+            if (endpoint, query) not in names:
+                name = f"{key}-{index}"
+                names[(endpoint, query)] = name
+                batch.append((name, endpoint, query))
+            if batch_priority is None or priority < batch_priority:
+                batch_priority = priority
+    return batch, names, batch_priority
+
+def _local_requests(pending):
+    """
+    List the requests among the pending ones that do not go to IGDB
+    
+    Args:
+        pending (dict): Requests of each lookup, keyed by game index
+        
+    Returns:
+        list: (index, key, request) for every _CacheGet, _CacheSet and _Call
+    """
+    return [
+        (index, key, request)
+        for index, requests in pending.items()
+        for key, request in requests.items()
+        if not isinstance(request, _Query)
+    ]
+
+def _split_results(pending, names, responses, cache_results):
+    """
+    Hand the results of a batch back to the lookups that asked for them
+    
+    Args:
+        pending (dict): Requests of each lookup, keyed by game index
+        names (dict): Sub-query name of each (endpoint, query)
+        responses (dict): Multiquery results keyed by sub-query name
+        cache_results (dict): Results of cache requests keyed by (index, key)
+        
+    Returns:
+        dict: Results for each lookup, keyed by game index
+    """
+    split = {}
+    handed_out = set()
+    for index, requests in pending.items():
+        split[index] = {}
+        for key, request in requests.items():
+            if not isinstance(request, _Query):
+                split[index][key] = cache_results[(index, key)]
+                continue
+            name = names[(request.endpoint, request.query)]
+            result = responses.get(name)
+            # Lookups process results in place, so shared results are copied
+            if name in handed_out:
+                result = copy.deepcopy(result)
+            handed_out.add(name)
+            split[index][key] = result
+    return split
+
+def _search_query(game_name):
+    """Build the query that resolves a game name to its IGDB ID"""
+    return f'search "{game_name}"; fields name,id; limit 1;'
+
+def _details_query(game_id):
+    """Build the query for the detailed information of one game"""
+    return f'where id = {game_id}; fields {GAME_DETAIL_FIELDS}; limit 1;'
+
+def _process_game_details(game):
+    """
+    Add display-ready fields to a raw IGDB game in place
+    
+    Args:
+        game (dict): Game as returned by the details query
+        
+    Returns:
+        dict: The same game, for convenience
+    """
     # Process image URLs to ensure they're complete
     if 'cover' in game and 'url' in game['cover']:
         # Replace t_thumb with t_cover_big for higher resolution
@@ -274,31 +1409,24 @@ def _search_and_get_game_details(client, game_name):
     
     game['language_support'] = language_support
     
-    # Process DLCs and expansions if available
+    return game
+
+def _get_add_on_ids(game):
+    """Get the IDs of a game's DLCs and expansions"""
     add_on_ids = []
     if 'dlcs' in game and game['dlcs']:
         add_on_ids.extend(game['dlcs'])
     if 'expansions' in game and game['expansions']:
         add_on_ids.extend(game['expansions'])
-        
-    if add_on_ids:
-        game['add_on_details'] = _get_add_on_details(client, add_on_ids)
-    else:
-        game['add_on_details'] = []
-    
-    # Process franchise data if available
-    franchise_id = None
+    return add_on_ids
+
+def _get_franchise_id(game):
+    """Get the ID of a game's main franchise, or None"""
     if 'franchise' in game and game['franchise']:
-        franchise_id = game['franchise']
+        return game['franchise']
     elif 'franchises' in game and game['franchises']:
-        franchise_id = game['franchises'][0]
-    
-    if franchise_id:
-        game['franchise_details'] = _get_franchise_details(client, franchise_id)
-    else:
-        game['franchise_details'] = None
-    
-    return game
+        return game['franchises'][0]
+    return None
 
 def _get_time_to_beat(client, game_id):
     """
@@ -311,9 +1439,23 @@ def _get_time_to_beat(client, game_id):
     Returns:
         dict: Time-to-beat data or None if not available
     """
-    query = f'where game_id = {game_id}; fields hastily, normally, completely, count; limit 1;'
-    time_to_beat_data = client.make_request("game_time_to_beats", query)
+    time_to_beat_data = client.make_request("game_time_to_beats", _time_to_beat_query(game_id))
+    return _process_time_to_beat(time_to_beat_data)
+
+def _time_to_beat_query(game_id):
+    """Build the time-to-beat query for one game"""
+    return f'where game_id = {game_id}; fields hastily, normally, completely, count; limit 1;'
+
+def _process_time_to_beat(time_to_beat_data):
+    """
+    Pick the time-to-beat entry from a query result and format its times
     
+    Args:
+        time_to_beat_data (list): Result of the time-to-beat query
+        
+    Returns:
+        dict: Time-to-beat data or None if not available
+    """
     if not time_to_beat_data or len(time_to_beat_data) == 0:
         return None
     
@@ -371,13 +1513,14 @@ def get_pegi_rating_url(rating):
     
     return pegi_map.get(rating)
 
-def _get_add_on_details(client, add_on_ids):
+def _get_add_on_details(client, add_on_ids, priority=PRIORITY_NORMAL):
     """
     Get details for DLCs and expansions from their IDs
     
     Args:
         client (IGDBClient): IGDB API client
         add_on_ids (list): List of DLC and expansion IDs
+        priority (int): Queue priority for the query
         
     Returns:
         list: Detailed add-on information
@@ -385,20 +1528,32 @@ def _get_add_on_details(client, add_on_ids):
     if not add_on_ids or len(add_on_ids) == 0:
         return []
     
+    add_on_details = client.make_request("games", _add_on_query(add_on_ids), priority)
+    return _process_add_ons(add_on_details)
+
+def _add_on_query(add_on_ids):
+    """Build the query for a game's DLCs and expansions"""
     # Limit to 15 add-ons to avoid large requests
     add_on_ids = add_on_ids[:15]
     
     # Create a comma-separated list of IDs
     ids_string = ','.join(str(id) for id in add_on_ids)
     
-    # Get add-on details
-    add_on_query = (
+    return (
         f'where id = ({ids_string}); '
         f'fields name,summary,cover.url,first_release_date,websites.url,websites.category,category; '
     )
+
+def _process_add_ons(add_on_details):
+    """
+    Add display-ready fields to raw add-on games in place
     
-    add_on_details = client.make_request("games", add_on_query)
-    
+    Args:
+        add_on_details (list): Result of the add-on query
+        
+    Returns:
+        list: Detailed add-on information
+    """
     if not add_on_details:
         return []
     
@@ -436,20 +1591,25 @@ def _get_add_on_details(client, add_on_ids):
     
     return add_on_details
 
-def _get_franchise_details(client, franchise_id):
+def _get_franchise_details(client, franchise_id, priority=PRIORITY_NORMAL):
     """
     Get detailed information about a franchise and its games
     
     Args:
         client (IGDBClient): IGDB API client
         franchise_id (int): ID of the franchise
+        priority (int): Queue priority for the queries
         
     Returns:
         dict: Detailed franchise information including games
     """
+    franchise_cache = get_franchise_cache()
+    franchise = franchise_cache.get(franchise_id)
+    if franchise is not None:
+        return franchise
+    
     # First get the franchise details
-    franchise_query = f'where id = {franchise_id}; fields name,slug,url,games;'
-    franchise_results = client.make_request("franchises", franchise_query)
+    franchise_results = client.make_request("franchises", _franchise_query(franchise_id), priority)
     
     if not franchise_results or len(franchise_results) == 0:
         return None
@@ -457,44 +1617,137 @@ def _get_franchise_details(client, franchise_id):
     franchise = franchise_results[0]
     
     # Get information about the games in this franchise
+    franchise_games = None
     if 'games' in franchise and franchise['games']:
-        # Limit to 20 games to avoid large requests
-        game_ids = franchise['games'][:20]
-        ids_string = ','.join(str(id) for id in game_ids)
-        
-        # Use version_parent = null to exclude editions of games
-        games_query = (
-            f'where id = ({ids_string}) & category = 0 & version_parent = null; ' 
-            f'fields name,cover.url,first_release_date,rating,total_rating,category; '
-            f'sort first_release_date asc;'
+        franchise_games = client.make_request("games", _franchise_games_query(franchise['games']), priority)
+    
+    failed = franchise.get('games') and franchise_games is None
+    franchise = _process_franchise(franchise, franchise_games)
+    # A timeline without its games is not cached, so the next lookup retries
+    if not failed:
+        franchise_cache.set(franchise_id, franchise)
+    return franchise
+
+def get_popular_franchise_ids(client, limit=100):
+    """
+    Get the franchises of the most rated games, most popular first
+    
+    Args:
+        client (IGDBClient): IGDB API client
+        limit (int): Number of franchises to return
+        
+    Returns:
+        list: IGDB franchise ids
+    """
+    franchise_ids = []
+    offset = 0
+    while len(franchise_ids) < limit:
+        games = client.make_request(
+            "games",
+            f'fields franchise,franchises; where total_rating_count > 0 & (franchise != null | franchises != null); '
+            f'sort total_rating_count desc; limit 500; offset {offset};',
+            PRIORITY_BACKGROUND,
         )
+        if not games:
+            break
+        for game in games:
+            franchise_id = _get_franchise_id(game)
+            if franchise_id and franchise_id not in franchise_ids:
+                franchise_ids.append(franchise_id)
+        offset += len(games)
+    return franchise_ids[:limit]
+
+def precompute_franchises(client, franchise_ids, executor=None):
+    """
+    Build and cache the timelines of many franchises in bulk
+    
+    Franchises are fetched 500 at a time and their games through /multiquery,
+    so each batch of ten franchises costs one request instead of twenty.
+    
+    Args:
+        client (IGDBClient): IGDB API client
+        franchise_ids (list): IGDB franchise ids
+        executor (ThreadPoolExecutor): Pool used to send multiquery chunks side
+            by side, defaults to the shared lookup pool
         
-        franchise_games = client.make_request("games", games_query)
+    Returns:
+        int: Number of franchises cached
+    """
+    if executor is None:
+        _, executor = _get_executors()
+    franchise_cache = get_franchise_cache()
+    cached = 0
+    for start in range(0, len(franchise_ids), 500):
+        ids_string = ','.join(str(id) for id in franchise_ids[start:start + 500])
+        franchises = client.make_request(
+            "franchises", f'where id = ({ids_string}); fields name,slug,url,games; limit 500;', PRIORITY_BACKGROUND
+        ) or []
         
-        if franchise_games:
-            # Process each game
-            for game in franchise_games:
-                # Process cover URL
-                if 'cover' in game and 'url' in game['cover']:
-                    game['cover']['url'] = game['cover']['url'].replace('t_thumb', 't_cover_big')
-                    if not game['cover']['url'].startswith('https:'):
-                        game['cover']['url'] = 'https:' + game['cover']['url']
-                    
-                # Format release date
-                if 'first_release_date' in game:
-                    release_date = datetime.fromtimestamp(game['first_release_date'])
-                    game['release_year'] = release_date.year
-                    game['formatted_release_date'] = release_date.strftime('%B %d, %Y')
+        batch = [
+            (f"franchise-{franchise['id']}", "games", _franchise_games_query(franchise['games']))
+            for franchise in franchises if franchise.get('games')
+        ]
+        responses = client.multiquery(batch, executor, PRIORITY_BACKGROUND) if batch else {}
+        
+        for franchise in franchises:
+            name = f"franchise-{franchise['id']}"
+            if franchise.get('games') and responses.get(name) is None:
+                # Leave franchises whose games could not be fetched to the hot path
+                continue
+            franchise_cache.set(franchise['id'], _process_franchise(franchise, responses.get(name)))
+            cached += 1
+    return cached
+
+def _franchise_query(franchise_id):
+    """Build the query for one franchise"""
+    return f'where id = {franchise_id}; fields name,slug,url,games;'
+
+def _franchise_games_query(game_ids):
+    """Build the query for the main games of a franchise"""
+    # Limit to 20 games to avoid large requests
+    game_ids = game_ids[:20]
+    ids_string = ','.join(str(id) for id in game_ids)
+    
+    # Use version_parent = null to exclude editions of games
+    return (
+        f'where id = ({ids_string}) & category = 0 & version_parent = null; ' 
+        f'fields name,cover.url,first_release_date,rating,total_rating,category; '
+        f'sort first_release_date asc;'
+    )
+
+def _process_franchise(franchise, franchise_games):
+    """
+    Attach the processed games of a franchise to it in place
+    
+    Args:
+        franchise (dict): Result of the franchise query
+        franchise_games (list): Result of the franchise games query, or None
+        
+    Returns:
+        dict: Detailed franchise information including games
+    """
+    if franchise_games:
+        # Process each game
+        for game in franchise_games:
+            # Process cover URL
+            if 'cover' in game and 'url' in game['cover']:
+                game['cover']['url'] = game['cover']['url'].replace('t_thumb', 't_cover_big')
+                if not game['cover']['url'].startswith('https:'):
+                    game['cover']['url'] = 'https:' + game['cover']['url']
                 
-                # Set game type to Main Game
-                game['type'] = 'Main Game'
-            
-            # Sort by release date (just to make sure)
-            franchise_games.sort(key=lambda x: x.get('first_release_date', 0))
+            # Format release date
+            if 'first_release_date' in game:
+                release_date = datetime.fromtimestamp(game['first_release_date'])
+                game['release_year'] = release_date.year
+                game['formatted_release_date'] = release_date.strftime('%B %d, %Y')
             
-            franchise['games_details'] = franchise_games
-        else:
-            franchise['games_details'] = []
+            # Set game type to Main Game
+            game['type'] = 'Main Game'
+        
+        # Sort by release date (just to make sure)
+        franchise_games.sort(key=lambda x: x.get('first_release_date', 0))
+        
+        franchise['games_details'] = franchise_games
     else:
         franchise['games_details'] = []
     
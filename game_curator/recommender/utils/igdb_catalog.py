@@ -0,0 +1,422 @@
+import time
+from django.db import connection, transaction
+from django.db.models import F, Q
+from .igdb_api import (
+    GAME_DETAIL_FIELDS, normalize_title, _process_game_details, _process_time_to_beat,
+    _process_add_ons, _process_franchise, _get_add_on_ids, _get_franchise_id,
+)
+from .rate_limiter import PRIORITY_BACKGROUND
+
+# Rows fetched per IGDB request while syncing (IGDB's maximum)
+CATALOG_PAGE_SIZE = 500
+
+# Fields mirrored from each IGDB endpoint, in the order endpoints must be synced
+CATALOG_FIELDS = {
+    'genres': 'name,slug,updated_at',
+    'themes': 'name,slug,updated_at',
+    'platforms': 'name,slug,updated_at',
+    'companies': 'name,slug,updated_at',
+    'franchises': 'name,slug,url,games,updated_at',
+    'games': f'{GAME_DETAIL_FIELDS},slug,category,version_parent,parent_game,updated_at',
+    'game_time_to_beats': 'game_id,hastily,normally,completely,count,updated_at',
+}
+CATALOG_ENDPOINTS = tuple(CATALOG_FIELDS)
+
+# Game fields that are mirrored into columns but not part of a live details query
+MIRROR_ONLY_GAME_FIELDS = ('slug', 'category', 'version_parent', 'parent_game', 'updated_at')
+
+def sync_endpoint(client, endpoint, page_size=CATALOG_PAGE_SIZE, progress=None, full=False, max_rows=None):
+    """
+    Bring the local mirror of an IGDB endpoint up to date
+
+    The first sync (or one with full=True) copies every row, paged by
+    ascending id. Later syncs only fetch the rows changed since the previous
+    one, paged by ascending updated_at. Progress is saved with every page, so
+    an interrupted sync resumes where it stopped.
+
+    Args:
+        client (IGDBClient): IGDB API client
+        endpoint (str): One of CATALOG_ENDPOINTS
+        page_size (int): Rows per IGDB request
+        progress (callable): Called as progress(endpoint, rows_synced) after each page
+        full (bool): Start over with a full sync even if the mirror is up to date
+        max_rows (int): Stop after this many rows (the next sync picks up from there)
+
+    Returns:
+        int: Number of rows synced
+    """
+    from ..models import CatalogSyncState
+
+    state, _ = CatalogSyncState.objects.get_or_create(endpoint=endpoint)
+    if full or (state.full_sync_started_at is None and state.updated_at_cursor is None):
+        state.full_sync_started_at = int(time.time())
+        state.last_id = 0
+        state.save()
+
+    total = 0
+    while max_rows is None or total < max_rows:
+        limit = page_size if max_rows is None else min(page_size, max_rows - total)
+        full_sync = state.full_sync_started_at is not None
+        if full_sync:
+            where = f'id > {state.last_id}; sort id asc'
+        else:
+            where = f'{_changed_since(state)}; sort updated_at asc'
+
+        query = f'fields {CATALOG_FIELDS[endpoint]}; where {where}; limit {limit};'
+        rows = client.make_request(endpoint, query, PRIORITY_BACKGROUND)
+        if rows is None:
+            raise RuntimeError(f"IGDB request for {endpoint} failed, run the sync again to resume")
+
+        if rows:
+            with transaction.atomic():
+                upsert_rows(endpoint, rows)
+                _advance_cursor(state, rows, full_sync)
+                state.save()
+            invalidate_cached_entries(endpoint, rows)
+            total += len(rows)
+            if progress:
+                progress(endpoint, total)
+
+        if len(rows) < limit:
+            if full_sync:
+                # Anything changed since the full sync started is picked up incrementally
+                state.updated_at_cursor = state.full_sync_started_at
+                state.cursor_ids = []
+                state.full_sync_started_at = None
+                state.save()
+            break
+
+    return total
+
+def _changed_since(state):
+    """IGDB filter for the rows changed after the incremental sync cursor"""
+    cursor = state.updated_at_cursor
+    if not state.cursor_ids:
+        return f'updated_at >= {cursor}'
+    # Rows stamped exactly at the cursor may not all have been synced yet
+    synced = ','.join(str(row_id) for row_id in state.cursor_ids)
+    return f'updated_at > {cursor} | (updated_at = {cursor} & id != ({synced}))'
+
+def _advance_cursor(state, rows, full_sync):
+    """Move the sync cursor past a page of rows"""
+    if full_sync:
+        state.last_id = rows[-1]['id']
+        return
+
+    latest = rows[-1].get('updated_at', 0)
+    ids = [row['id'] for row in rows if row.get('updated_at', 0) == latest]
+    if latest == state.updated_at_cursor:
+        state.cursor_ids = state.cursor_ids + ids
+    else:
+        state.updated_at_cursor = latest
+        state.cursor_ids = ids
+
+def invalidate_cached_entries(endpoint, rows):
+    """
+    Drop the cached games and franchise timelines that include any of these changed rows
+
+    Besides the changed games themselves, that covers the games listing a
+    changed game among their add-ons or franchise games, the timelines of
+    the changed games' franchises, and the games linked to a changed
+    franchise, genre, theme, platform or company.
+
+    Only caches shared between processes (db or django backends) see the
+    invalidation when it runs from a management command.
+
+    Args:
+        endpoint (str): One of CATALOG_ENDPOINTS
+        rows (list): Changed rows, already upserted
+
+    Returns:
+        tuple: Number of games and of franchises invalidated
+    """
+    from ..models import Game
+    from .igdb_api import core_cache_key, get_game_cache, get_franchise_cache
+
+    ids = [row['id'] for row in rows]
+    franchise_ids = set()
+    if endpoint == 'games':
+        games = Game.objects.filter(id__in=ids)
+        franchise_ids.update(games.exclude(franchise=None).values_list('franchise_id', flat=True))
+        franchise_ids.update(games.values_list('franchises', flat=True))
+        franchise_ids.discard(None)
+        game_ids = set(ids)
+        game_ids.update(games.exclude(parent_game=None).values_list('parent_game', flat=True))
+        game_ids.update(_franchise_game_ids(franchise_ids))
+    elif endpoint == 'franchises':
+        franchise_ids.update(ids)
+        game_ids = _franchise_game_ids(ids)
+    elif endpoint == 'game_time_to_beats':
+        game_ids = {row['game_id'] for row in rows if 'game_id' in row}
+    else:
+        # genres, themes, platforms and companies
+        game_ids = set(Game.objects.filter(**{f'{endpoint}__in': ids}).values_list('id', flat=True))
+
+    get_game_cache().delete_many([key for game_id in game_ids for key in (game_id, core_cache_key(game_id))])
+    get_franchise_cache().delete_many(franchise_ids)
+    return len(game_ids), len(franchise_ids)
+
+def _franchise_game_ids(franchise_ids):
+    """Ids of the mirrored games that belong to any of these franchises"""
+    from ..models import Game
+
+    if not franchise_ids:
+        return set()
+    return set(Game.objects.filter(
+        Q(franchise_id__in=franchise_ids) | Q(franchises__in=franchise_ids)
+    ).values_list('id', flat=True))
+
+def upsert_rows(endpoint, rows):
+    """
+    Insert or update a page of IGDB rows in the local mirror
+
+    Args:
+        endpoint (str): One of CATALOG_ENDPOINTS
+        rows (list): Rows as returned by IGDB with CATALOG_FIELDS[endpoint]
+    """
+    from ..models import Genre, Theme, Platform, Company
+
+    upserts = {
+        'genres': lambda rows: _upsert_named(Genre, rows),
+        'themes': lambda rows: _upsert_named(Theme, rows),
+        'platforms': lambda rows: _upsert_named(Platform, rows),
+        'companies': lambda rows: _upsert_named(Company, rows),
+        'franchises': _upsert_franchises,
+        'games': _upsert_games,
+        'game_time_to_beats': _upsert_time_to_beats,
+    }
+    with transaction.atomic():
+        upserts[endpoint](rows)
+
+def _bulk_upsert(model, objects, update_fields):
+    """Insert objects, updating the rows that already exist, in one statement"""
+    options = {'update_conflicts': True, 'update_fields': update_fields}
+    # MySQL upserts on any unique key and refuses an explicit conflict target
+    if connection.features.supports_update_conflicts_with_target:
+        options['unique_fields'] = [model._meta.pk.name]
+    model.objects.bulk_create(objects, **options)
+
+def _upsert_named(model, rows):
+    """Upsert rows of a simple name/slug endpoint"""
+    _bulk_upsert(model, [
+        model(
+            id=row['id'],
+            name=row.get('name', '')[:255],
+            slug=row.get('slug', '')[:255],
+            updated_at=row.get('updated_at'),
+        )
+        for row in rows
+    ], ['name', 'slug', 'updated_at'])
+
+def _upsert_franchises(rows):
+    """Upsert franchise rows"""
+    from ..models import Franchise
+
+    _bulk_upsert(Franchise, [
+        Franchise(
+            id=row['id'],
+            name=row.get('name', '')[:255],
+            slug=row.get('slug', '')[:255],
+            url=row.get('url', '')[:500],
+            game_ids=row.get('games', []),
+            updated_at=row.get('updated_at'),
+        )
+        for row in rows
+    ], ['name', 'slug', 'url', 'game_ids', 'updated_at'])
+
+def _upsert_games(rows):
+    """Upsert game rows along with their genre, theme, platform, franchise and company links"""
+    from ..models import Game, GameTitle, InvolvedCompany, Company
+
+    _bulk_upsert(Game, [
+        Game(
+            id=row['id'],
+            name=row.get('name', '')[:255],
+            slug=row.get('slug', '')[:255],
+            category=row.get('category'),
+            version_parent=row.get('version_parent'),
+            parent_game=row.get('parent_game'),
+            first_release_date=row.get('first_release_date'),
+            rating=row.get('rating'),
+            total_rating=row.get('total_rating'),
+            total_rating_count=row.get('total_rating_count'),
+            franchise_id=row.get('franchise'),
+            updated_at=row.get('updated_at'),
+            data={key: value for key, value in row.items() if key not in MIRROR_ONLY_GAME_FIELDS},
+        )
+        for row in rows
+    ], [
+        'name', 'slug', 'category', 'version_parent', 'parent_game', 'first_release_date',
+        'rating', 'total_rating', 'total_rating_count', 'franchise', 'updated_at', 'data',
+    ])
+
+    game_ids = [row['id'] for row in rows]
+
+    # Index every name of the game, so lookups by title skip the IGDB search
+    GameTitle.objects.filter(game_id__in=game_ids).delete()
+    GameTitle.objects.bulk_create([
+        GameTitle(game_id=row['id'], search_name=search_name[:255])
+        for row in rows
+        for search_name in dict.fromkeys(
+            normalize_title(name) for name in
+            [row.get('name', '')] + [alt['name'] for alt in row.get('alternative_names', []) if 'name' in alt]
+        )
+        if search_name
+    ])
+
+    _replace_links('genres', rows, lambda row: [genre['id'] for genre in row.get('genres', [])])
+    _replace_links('themes', rows, lambda row: [theme['id'] for theme in row.get('themes', [])])
+    _replace_links('platforms', rows, lambda row: [platform['id'] for platform in row.get('platforms', [])])
+    _replace_links('franchises', rows, lambda row: row.get('franchises', []))
+
+    # Involved companies carry developer/publisher flags, so they have their own model
+    involvements = {}
+    for row in rows:
+        for involved in row.get('involved_companies', []):
+            if 'company' in involved:
+                involvements[(row['id'], involved['company']['id'])] = involved
+    known_companies = set(Company.objects.filter(
+        id__in={company_id for _, company_id in involvements}
+    ).values_list('id', flat=True))
+
+    InvolvedCompany.objects.filter(game_id__in=game_ids).delete()
+    InvolvedCompany.objects.bulk_create([
+        InvolvedCompany(
+            game_id=game_id,
+            company_id=company_id,
+            developer=involved.get('developer', False),
+            publisher=involved.get('publisher', False),
+        )
+        for (game_id, company_id), involved in involvements.items()
+        if company_id in known_companies
+    ])
+
+def _replace_links(field_name, rows, get_ids):
+    """
+    Replace the many-to-many links of a page of games
+
+    Links to rows that are not mirrored (yet) are skipped.
+
+    Args:
+        field_name (str): Many-to-many field of Game
+        rows (list): IGDB game rows
+        get_ids (callable): Returns the linked IGDB ids of a row
+    """
+    from ..models import Game
+
+    field = Game._meta.get_field(field_name)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+
+    wanted = {row['id']: dict.fromkeys(get_ids(row)) for row in rows}
+    known = set(field.related_model.objects.filter(
+        id__in={linked_id for linked_ids in wanted.values() for linked_id in linked_ids}
+    ).values_list('id', flat=True))
+
+    through.objects.filter(**{f'{source}__in': list(wanted)}).delete()
+    through.objects.bulk_create([
+        through(**{f'{source}_id': game_id, f'{target}_id': linked_id})
+        for game_id, linked_ids in wanted.items()
+        for linked_id in linked_ids
+        if linked_id in known
+    ])
+
+def _upsert_time_to_beats(rows):
+    """Upsert time-to-beat rows"""
+    from ..models import GameTimeToBeat
+
+    _bulk_upsert(GameTimeToBeat, [
+        GameTimeToBeat(
+            id=row['id'],
+            game_id=row['game_id'],
+            hastily=row.get('hastily'),
+            normally=row.get('normally'),
+            completely=row.get('completely'),
+            count=row.get('count'),
+            updated_at=row.get('updated_at'),
+        )
+        for row in rows
+        if 'game_id' in row
+    ], ['game_id', 'hastily', 'normally', 'completely', 'count', 'updated_at'])
+
+def get_mirrored_game(game_id=None, title=None):
+    """
+    Build a game from the local mirror, in the same shape as a live IGDB lookup
+
+    Args:
+        game_id (int): IGDB id of the game, if known
+        title (str): Game name to look up by normalized title when the id is not known
+
+    Returns:
+        dict: Detailed game information, or None if the game is not mirrored
+    """
+    from ..models import Game, GameTimeToBeat, Franchise
+
+    games = Game.objects.only('id', 'data')
+    if game_id is not None:
+        row = games.filter(id=game_id).first()
+    else:
+        # Several games can share a name; prefer the best known one, like the IGDB search does
+        row = games.filter(titles__search_name=normalize_title(title)).order_by(
+            F('total_rating_count').desc(nulls_last=True)
+        ).first()
+    if row is None:
+        return None
+
+    game = row.data
+    game['id'] = row.id
+
+    time_to_beat = GameTimeToBeat.objects.filter(game_id=row.id).values(
+        'id', 'hastily', 'normally', 'completely', 'count'
+    ).first()
+    time_to_beat = _process_time_to_beat([_without_nulls(time_to_beat)] if time_to_beat else None)
+    if time_to_beat:
+        game['time_to_beat'] = time_to_beat
+
+    _process_game_details(game)
+
+    # Limit to 15 add-ons, like the live query
+    add_on_ids = _get_add_on_ids(game)[:15]
+    add_ons = [
+        _mirrored_subset(add_on, ('name', 'summary', 'cover', 'first_release_date', 'websites'))
+        for add_on in Game.objects.filter(id__in=add_on_ids).order_by('id')
+    ]
+    game['add_on_details'] = _process_add_ons(add_ons)
+
+    franchise = None
+    franchise_id = _get_franchise_id(game)
+    franchise_row = Franchise.objects.filter(id=franchise_id).first() if franchise_id else None
+    if franchise_row:
+        franchise = _without_nulls({
+            'id': franchise_row.id,
+            'name': franchise_row.name,
+            'slug': franchise_row.slug or None,
+            'url': franchise_row.url or None,
+            'games': franchise_row.game_ids or None,
+        })
+        franchise_games = None
+        if franchise_row.game_ids:
+            # Limit to 20 games and skip editions, like the live query
+            franchise_games = [
+                _mirrored_subset(franchise_game, ('name', 'cover', 'first_release_date', 'rating', 'total_rating'))
+                for franchise_game in Game.objects.filter(
+                    id__in=franchise_row.game_ids[:20], category=0, version_parent__isnull=True,
+                ).order_by('first_release_date')
+            ]
+        franchise = _process_franchise(franchise, franchise_games)
+    game['franchise_details'] = franchise
+
+    return game
+
+def _mirrored_subset(row, fields):
+    """Rebuild the IGDB dict a live query for these fields would return for a mirrored game"""
+    subset = {'id': row.id}
+    subset.update({field: row.data[field] for field in fields if field in row.data})
+    if row.category is not None:
+        subset['category'] = row.category
+    return subset
+
+def _without_nulls(values):
+    """Drop empty values, which IGDB leaves out of its responses"""
+    return {key: value for key, value in values.items() if value is not None}
@@ -0,0 +1,176 @@
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from contextlib import contextmanager, asynccontextmanager
+
+# Request priorities, lowest value goes first
+PRIORITY_INTERACTIVE = 0  # The main game the user is waiting for
+PRIORITY_NORMAL = 1       # Similar games and other on-page lookups
+PRIORITY_ENRICHMENT = 2   # Time-to-beat, add-ons and franchise sections
+PRIORITY_BACKGROUND = 3   # Management commands and scheduled jobs
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter with a cap on open requests
+
+    Requests wait in a priority queue, so when the bucket is empty the most
+    important waiting request is always the next one to go. One limiter is
+    shared by every thread (and event loop) of a worker process.
+    """
+
+    def __init__(self, rate=4, burst=None, max_open=8):
+        """
+        Args:
+            rate (float): Requests allowed per second
+            burst (int): Requests that may start back to back after a quiet period (defaults to rate)
+            max_open (int): Maximum number of requests in flight at once
+        """
+        self.rate = rate
+        self.capacity = burst or rate
+        self.max_open = max_open
+
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._open = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+        # Counters reported by stats()
+        self._requests = 0
+        self._throttled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _refill(self):
+        """Add the tokens earned since the last refill"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _try_take(self, ticket):
+        """
+        Try to let a queued request start. Must be called with the lock held.
+
+        Returns:
+            float: 0 if the request may start, seconds until the next token,
+                or None if it has to wait for another request to move first
+        """
+        if self._waiting[0] != ticket or self._open >= self.max_open:
+            return None
+
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            self._open += 1
+            heapq.heappop(self._waiting)
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def _enqueue(self, priority):
+        """Add a request to the queue and return its ticket. Must be called with the lock held."""
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _dequeue(self, ticket):
+        """Drop a request that gave up waiting. Must be called with the lock held."""
+        if ticket in self._waiting:
+            self._waiting.remove(ticket)
+            heapq.heapify(self._waiting)
+        self._condition.notify_all()
+
+    def _record_start(self, started):
+        """Update wait statistics once a request may start. Must be called with the lock held."""
+        waited = time.monotonic() - started
+        self._requests += 1
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+        # The next request in line may be able to go as well
+        self._condition.notify_all()
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        """Block until a request with this priority may start"""
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(priority)
+            try:
+                while True:
+                    wait = self._try_take(ticket)
+                    if wait == 0:
+                        break
+                    self._condition.wait(timeout=wait)
+            except BaseException:
+                self._dequeue(ticket)
+                raise
+            self._record_start(started)
+
+    async def acquire_async(self, priority=PRIORITY_NORMAL):
+        """Wait without blocking the event loop until a request with this priority may start"""
+        started = time.monotonic()
+        with self._condition:
+            ticket = self._enqueue(priority)
+        try:
+            while True:
+                with self._condition:
+                    wait = self._try_take(ticket)
+                    if wait == 0:
+                        self._record_start(started)
+                        return
+                # Async waiters cannot be notified, so poll until it is our turn
+                await asyncio.sleep(wait or 0.01)
+        except BaseException:
+            with self._condition:
+                self._dequeue(ticket)
+            raise
+
+    def release(self):
+        """Mark a started request as finished"""
+        with self._condition:
+            self._open -= 1
+            self._condition.notify_all()
+
+    def throttled(self):
+        """Record that the API rejected a request for exceeding its rate limit"""
+        with self._condition:
+            self._throttled += 1
+            # Spend the remaining burst so everyone slows down, not just the retry
+            self._refill()
+            self._tokens = min(self._tokens, 0)
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_NORMAL):
+        """Context manager that holds a request slot for the duration of the block"""
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    @asynccontextmanager
+    async def async_slot(self, priority=PRIORITY_NORMAL):
+        """Async context manager that holds a request slot for the duration of the block"""
+        await self.acquire_async(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        """
+        Get queue and wait-time statistics
+
+        Returns:
+            dict: Current queue depth and open requests, plus totals since startup
+        """
+        with self._condition:
+            return {
+                'queue_depth': len(self._waiting),
+                'open_requests': self._open,
+                'requests': self._requests,
+                'throttled': self._throttled,
+                'average_wait': self._total_wait / self._requests if self._requests else 0.0,
+                'max_wait': self._max_wait,
+            }
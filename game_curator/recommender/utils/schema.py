@@ -0,0 +1,135 @@
+from .igdb_api import _get_add_on_ids, _get_franchise_id
+
+# Version of the compact /recommend/ payload. Bump it when a field is removed
+# or changes meaning, so clients can tell payloads apart.
+SCHEMA_VERSION = 1
+
+# Fields of the main game: everything renderMainGame() in recommender.html uses
+MAIN_GAME_FIELDS = (
+    'id', 'name', 'summary', 'storyline', 'cover', 'screenshots',
+    'rating', 'total_rating', 'first_release_date', 'release_year', 'formatted_release_date',
+    'genre_names', 'platform_names', 'theme_names', 'game_mode_names',
+    'developers', 'publishers', 'alt_names', 'official_website', 'stores',
+    'esrb_rating_cover_url', 'pegi_rating_cover_url', 'language_support',
+    'time_to_beat', 'add_on_details', 'franchise_details',
+)
+
+# Fields of a similar game card
+SIMILAR_GAME_FIELDS = (
+    'id', 'name', 'summary', 'cover', 'rating', 'total_rating', 'first_release_date',
+    'genre_names', 'stores',
+)
+
+TIME_TO_BEAT_FIELDS = ('hastily_formatted', 'normally_formatted', 'completely_formatted', 'count')
+ADD_ON_FIELDS = ('id', 'name', 'summary', 'cover', 'type', 'release_year', 'stores')
+FRANCHISE_FIELDS = ('id', 'name', 'games_details')
+FRANCHISE_GAME_FIELDS = ('id', 'name', 'cover', 'first_release_date', 'release_year', 'rating', 'total_rating', 'type')
+
+# Sections a core main game leaves out; the page fetches them when opened
+CORE_OMITTED_FIELDS = ('add_on_details', 'franchise_details', 'language_support')
+
+# Screenshots per page of /api/game/<id>/screenshots/, and in a core main game
+SCREENSHOT_PAGE_SIZE = 6
+
+def compact_game_details(game_details, core=False):
+    """
+    Slim the result of get_game_details() down to the versioned /recommend/ schema
+
+    Raw IGDB arrays (involved_companies, genres, websites, age_ratings, ...)
+    are dropped in favour of the derived fields the page renders, and empty
+    values are left out.
+
+    Args:
+        game_details (dict): Main game and similar games from get_game_details()
+        core (bool): Use the core layout for the main game (see compact_main_game())
+
+    Returns:
+        dict: Compact main game and similar games
+    """
+    main_game = game_details['main_game']
+    return {
+        'main_game': compact_main_game(main_game, core) if main_game else None,
+        'similar_games': [compact_similar_game(game) for game in game_details['similar_games'] if game],
+    }
+
+def compact_similar_game(game):
+    """
+    Slim a processed game down to the fields of a similar game card
+
+    Args:
+        game (dict): Processed game from get_game_details()
+
+    Returns:
+        dict: Compact game
+    """
+    return _pick(game, SIMILAR_GAME_FIELDS)
+
+def compact_main_game(game, core=False):
+    """
+    Slim a processed game down to the fields of the main game card
+
+    The core layout leaves out add-ons, franchise and language support and
+    only keeps the first page of screenshots. Counts and IDs tell the page
+    which of those sections to offer.
+
+    Args:
+        game (dict): Processed game from get_game_details()
+        core (bool): Use the core layout
+
+    Returns:
+        dict: Compact game
+    """
+    compact = _pick(game, MAIN_GAME_FIELDS)
+    if 'screenshots' in compact:
+        compact['screenshots'] = compact_screenshots(compact['screenshots'])
+    if 'time_to_beat' in compact:
+        compact['time_to_beat'] = _pick(compact['time_to_beat'], TIME_TO_BEAT_FIELDS)
+    if 'add_on_details' in compact:
+        compact['add_on_details'] = compact_add_ons(compact['add_on_details'])
+    if 'franchise_details' in compact:
+        compact['franchise_details'] = compact_franchise(compact['franchise_details'])
+
+    if core:
+        for field in CORE_OMITTED_FIELDS:
+            compact.pop(field, None)
+        compact.update(_pick({
+            'add_on_count': len(_get_add_on_ids(game)),
+            'franchise_id': _get_franchise_id(game),
+            'screenshot_count': len(game.get('screenshots') or []),
+            'has_language_support': bool(game.get('language_support')) or None,
+        }, ('add_on_count', 'franchise_id', 'screenshot_count', 'has_language_support')))
+        if 'screenshots' in compact:
+            compact['screenshots'] = compact['screenshots'][:SCREENSHOT_PAGE_SIZE]
+    return compact
+
+def compact_screenshots(screenshots):
+    """Keep only the URL of each screenshot"""
+    return [_pick(screenshot, ('url',)) for screenshot in screenshots]
+
+def compact_add_ons(add_ons):
+    """Slim add-ons down to the fields of an add-on card"""
+    return [_pick(add_on, ADD_ON_FIELDS) for add_on in add_ons]
+
+def compact_franchise(franchise):
+    """Slim a franchise down to the fields of the franchise timeline"""
+    compact = _pick(franchise, FRANCHISE_FIELDS)
+    # The timeline filters this list, so it is kept even when empty
+    compact['games_details'] = [
+        _pick(franchise_game, FRANCHISE_GAME_FIELDS)
+        for franchise_game in franchise.get('games_details') or []
+    ]
+    return compact
+
+def _pick(values, fields):
+    """Copy the non-empty values of these fields, keeping only the URL of covers"""
+    picked = {}
+    for field in fields:
+        value = values.get(field)
+        if value is None or value == [] or value == {}:
+            continue
+        if field == 'cover':
+            if 'url' not in value:
+                continue
+            value = {'url': value['url']}
+        picked[field] = value
+    return picked
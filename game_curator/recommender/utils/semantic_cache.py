@@ -0,0 +1,248 @@
+import os
+import math
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: workers then must not share an index directory
+    fcntl = None
+
+# Buckets of the hashed feature vectors. Each bucket is one row of the index,
+# so the size of the index is HASH_DIM bytes per cached prompt.
+HASH_DIM = 1024
+
+# Lookups only read the rows of this many of the prompt's buckets, which
+# bounds their cost. Longer prompts can only match less, never wrongly.
+MAX_QUERY_BUCKETS = 64
+
+# Words that say nothing about which games are wanted
+STOPWORDS = frozenset(
+    'a about an and any are but can for from game games give i im in is it like looking me my of on or '
+    'play please recommend some something similar such than that the to want with'.split()
+)
+
+# Words that turn a prompt around: "games like dark souls" and "games not
+# like dark souls" share every other feature, so prompts with any of these
+# are never answered, or used to answer, by similarity
+NEGATION_WORDS = frozenset(
+    'no not non without except excluding exclude nothing never nor none dont doesnt isnt arent instead'.split()
+)
+
+def has_negation(normalized_prompt):
+    """Whether a prompt contains one of NEGATION_WORDS"""
+    return not NEGATION_WORDS.isdisjoint(normalized_prompt.split())
+
+def embed_prompt(normalized_prompt):
+    """
+    Hash a prompt into the buckets of its words, word pairs and character trigrams
+
+    Paraphrases share most of these features: "games like dark souls" and
+    "dark souls like games" have the same ones, and trigrams make
+    "soulslike" close to "souls like".
+
+    Args:
+        normalized_prompt (str): Prompt from gemini_api.normalize_prompt()
+
+    Returns:
+        ndarray: Sorted, distinct bucket numbers
+    """
+    # numpy takes about 80 ms to import, so only workers that use the
+    # semantic cache (SEMANTIC_CACHE_ENABLED=1) import it
+    import numpy as np
+
+    words = [word for word in normalized_prompt.split() if word not in STOPWORDS]
+    features = {f"w:{word}" for word in words}
+    features.update(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    for word in words:
+        padded = f"#{word}#"
+        features.update(f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2))
+    return np.unique(np.fromiter(
+        (zlib.crc32(feature.encode('utf-8')) % HASH_DIM for feature in features),
+        dtype=np.intp, count=len(features),
+    ))
+
+class SemanticIndex:
+    """
+    Index of earlier prompts, to find the closest one to a new prompt
+
+    Prompts are stored as binary vectors of hashed features (see
+    embed_prompt()) in a HASH_DIM x capacity uint8 matrix, one row per
+    bucket, so a lookup only sums the rows of the new prompt's buckets to
+    get the overlap with every cached prompt at once. Cosine similarity is
+    then the overlap divided by the norms of both vectors.
+
+    The matrices live in .npy files that every worker memory-maps, so they
+    share one copy and see each other's additions right away. Once full,
+    the oldest prompts are overwritten. Each slot holds the prompt cache
+    key of the answer, and the answer itself stays in the prompt cache.
+    """
+
+    def __init__(self, path, capacity, threshold):
+        self.path = Path(path)
+        self.capacity = capacity
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self._open()
+
+    @contextmanager
+    def _file_lock(self):
+        """Hold the lock that keeps workers from writing to the index at the same time"""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path / 'index.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _open(self):
+        """Map the index files, creating them when missing or sized differently"""
+        import numpy as np
+        from numpy.lib.format import open_memmap
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        shapes = {
+            'vectors': ((HASH_DIM, self.capacity), np.uint8),
+            'inverse_norms': ((self.capacity,), np.float32),
+            'counts': ((self.capacity,), np.uint8),
+            'keys': ((self.capacity,), 'S80'),
+            # Next slot to write and number of slots in use
+            'meta': ((2,), np.int64),
+        }
+        with self._file_lock():
+            try:
+                arrays = {name: open_memmap(self.path / f"{name}.npy", mode='r+') for name in shapes}
+                if any(arrays[name].shape != shape for name, (shape, _dtype) in shapes.items()):
+                    raise ValueError("Index files do not match the configured size")
+            except (OSError, ValueError):
+                arrays = {
+                    name: open_memmap(self.path / f"{name}.npy", mode='w+', dtype=dtype, shape=shape)
+                    for name, (shape, dtype) in shapes.items()
+                }
+        # Plain ndarray views of the maps are much cheaper to slice than np.memmap
+        self.vectors = arrays['vectors'].view(np.ndarray)
+        self.inverse_norms = arrays['inverse_norms'].view(np.ndarray)
+        self.counts = arrays['counts'].view(np.ndarray)
+        self.keys = arrays['keys'].view(np.ndarray)
+        self.meta = arrays['meta'].view(np.ndarray)
+        self._maps = arrays
+
+    def lookup(self, normalized_prompt, count):
+        """
+        Find the cached prompt most similar to this one
+
+        Args:
+            normalized_prompt (str): Prompt from gemini_api.normalize_prompt()
+            count (int): Number of game recommendations requested; only
+                prompts cached with the same count match
+
+        Returns:
+            tuple: (prompt cache key, similarity) of the closest prompt, or
+                None if no prompt reaches the threshold or the prompt is negated
+        """
+        import numpy as np
+
+        started = time.perf_counter()
+        match = None
+        buckets = embed_prompt(normalized_prompt)
+        size = int(self.meta[1])
+        if len(buckets) and size and not has_negation(normalized_prompt):
+            overlap = self.vectors[buckets[0], :size].copy()
+            for bucket in buckets[1:MAX_QUERY_BUCKETS]:
+                np.add(overlap, self.vectors[bucket, :size], out=overlap)
+            scores = overlap * self.inverse_norms[:size]
+            best = int(scores.argmax())
+            if self.counts[best] != count:
+                # Rare: prompts were cached for several counts
+                scores *= self.counts[:size] == count
+                best = int(scores.argmax())
+            similarity = float(scores[best]) / math.sqrt(len(buckets))
+            if similarity >= self.threshold:
+                match = (self.keys[best].decode('ascii'), similarity)
+
+        with self._lock:
+            self.lookup_seconds += time.perf_counter() - started
+            if match:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return match
+
+    def add(self, normalized_prompt, count, key):
+        """
+        Remember a prompt whose answer is cached under this prompt cache key
+
+        Args:
+            normalized_prompt (str): Prompt from gemini_api.normalize_prompt()
+            count (int): Number of game recommendations requested
+            key (str): Key of the answer in the prompt cache
+        """
+        buckets = embed_prompt(normalized_prompt)
+        if not len(buckets) or has_negation(normalized_prompt):
+            return
+        with self._lock, self._file_lock():
+            slot = int(self.meta[0])
+            # A zero norm hides the slot from lookups while it is rewritten
+            self.inverse_norms[slot] = 0
+            self.vectors[:, slot] = 0
+            self.vectors[buckets, slot] = 1
+            self.counts[slot] = count
+            self.keys[slot] = key.encode('ascii')
+            self.inverse_norms[slot] = 1 / math.sqrt(len(buckets))
+            self.meta[0] = (slot + 1) % self.capacity
+            self.meta[1] = min(int(self.meta[1]) + 1, self.capacity)
+
+    def stats(self):
+        """
+        Get hit/miss counters since startup
+
+        Returns:
+            dict: Size, hits, misses, hit rate and average lookup time
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': int(self.meta[1]),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'average_lookup_ms': self.lookup_seconds / total * 1000 if total else 0.0,
+            }
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_semantic_index():
+    """
+    Get the process-wide semantic prompt index, opening it on first use
+
+    Off unless SEMANTIC_CACHE_ENABLED=1. Configured with SEMANTIC_CACHE_DIR
+    (by default in the system temp directory, outside the source tree),
+    SEMANTIC_CACHE_MAX_ENTRIES and SEMANTIC_CACHE_THRESHOLD.
+
+    Returns:
+        SemanticIndex: The index, or None when the semantic cache is disabled
+    """
+    global _index
+    if os.getenv('SEMANTIC_CACHE_ENABLED', '0') != '1':
+        return None
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SemanticIndex(
+                    os.getenv('SEMANTIC_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'game_curator_semantic_cache')),
+                    int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', 100000)),
+                    float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.9)),
+                )
+    return _index
@@ -1,93 +1,431 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.template.defaultfilters import date as format_date
 import json
-from datetime import datetime
-from django.contrib.auth.decorators import login_required
-from .utils.gemini_api import get_game_recommendations
-from .utils.igdb_api import get_game_details
+import base64
+import asyncio
+from contextlib import aclosing
+from datetime import datetime, timezone
+from django.contrib.auth.decorators import login_required, user_passes_test
+from asgiref.sync import sync_to_async
+from .utils.gemini_api import aiter_game_recommendations, get_gemini_stats
+from .utils.igdb_api import (
+    aget_game_details, aiter_game_details, get_game_add_ons, get_game_by_id, get_game_franchise, get_igdb_client,
+)
+from .utils.cache import get_cache_stats
+from .utils.favorites import forget_favorite_ids, get_favorite_ids, import_favorites
+from .utils.semantic_cache import get_semantic_index
+from .utils.schema import (
+    SCHEMA_VERSION, SCREENSHOT_PAGE_SIZE, compact_add_ons, compact_franchise, compact_game_details,
+    compact_main_game, compact_screenshots, compact_similar_game,
+)
 from .models import Favorite
 
+# Most game ids /api/favorite-status/ answers for in one request
+MAX_FAVORITE_STATUS_IDS = 100
+
+# Most favorites /api/favorites/bulk/ adds or removes in one request
+MAX_BULK_FAVORITES = 1000
+
+# Actions of /api/favorites/bulk/; "import" adds games known only by IGDB id,
+# such as a library exported from elsewhere
+BULK_FAVORITE_ACTIONS = ('add', 'import', 'remove')
+
+# Favorites per page of the favorites page and of /api/favorites/
+FAVORITES_PAGE_SIZE = 24
+
+# Content types of the ?stream= modes of the recommender view
+STREAM_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
 def landing_page(request):
     """View for the landing page of the game recommender application."""
     return render(request, 'recommender/landing.html')
 
 @login_required
-def recommender(request):
-    """View for the game recommendation form and results."""
+async def recommender(request):
+    """
+    View for the game recommendation form and results.
+    
+    Async so that a worker is not tied up while waiting on Gemini and IGDB
+    when served over ASGI. With ?stream=ndjson or ?stream=sse, results are
+    streamed piece by piece as they become ready (see _recommendation_events()).
+    With ?core=1, add-ons, franchise and language support are left out and
+    the page fetches them from the game section endpoints when opened.
+    Every game comes with an "is_favorite" flag for the current user.
+    """
     context = {}
     if request.method == 'POST':
         try:
+            user = await request.auser()
             data = json.loads(request.body)
             user_prompt = data.get('prompt', '')
             
-            if user_prompt:
-                # Step 1: Get game name recommendations from Gemini API
-                game_names = get_game_recommendations(user_prompt)
+            full = request.GET.get('full') == '1'
+            stream = request.GET.get('stream')
+            core = request.GET.get('core') == '1'
+            
+            if user_prompt and stream in STREAM_CONTENT_TYPES:
+                response = StreamingHttpResponse(
+                    _format_events(_recommendation_events(user_prompt, user, full, core), stream),
+                    content_type=STREAM_CONTENT_TYPES[stream],
+                )
+                response['Cache-Control'] = 'no-cache'
+                # Ask proxies such as nginx to pass each event through right away
+                response['X-Accel-Buffering'] = 'no'
+                return response
+            elif user_prompt:
+                # Get game name recommendations from Gemini API, and detailed
+                # information about each game from IGDB API as soon as it is named
+                game_details = await aget_game_details(aiter_game_recommendations(user_prompt), core=core)
                 
-                # Step 2: Get detailed game information from IGDB API
-                game_details = get_game_details(game_names)
+                # Only send what the page renders, unless the client asks for everything
+                if not full:
+                    game_details = compact_game_details(game_details, core)
+                
+                # Flag the user's favorites, so the page needs no follow-up calls
+                games = [game for game in [game_details['main_game'], *game_details['similar_games']] if game]
+                favorite_ids = await sync_to_async(get_favorite_ids)(user)
+                for game in games:
+                    game['is_favorite'] = game['id'] in favorite_ids
                 
                 return JsonResponse({
-                    'success': True, 
+                    'success': True,
+                    'schema_version': SCHEMA_VERSION,
                     'main_game': game_details['main_game'],
                     'similar_games': game_details['similar_games']
-                })
+                }, json_dumps_params={'separators': (',', ':')})
             else:
                 return JsonResponse({'success': False, 'error': 'No prompt provided'})
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
-    # For GET requests, just render the form
-    return render(request, 'recommender/recommender.html', context)
+    # For GET requests, just render the form (templates may touch the
+    # database through request.user, which is not allowed in async code)
+    return await sync_to_async(render)(request, 'recommender/recommender.html', context)
+
+async def _recommendation_events(user_prompt, user, full=False, core=False):
+    """
+    Produce the events of a streamed recommendation as each piece becomes ready
+    
+    Events are dicts with a "type": "game" for the main game and for each
+    similar game as soon as its details are ready (with its "role" and its
+    "index" among the names, and "is_favorite" set on the game), and "done"
+    last, telling whether the main game was found. Each game event is
+    preceded by a "names" event whenever Gemini has named more games since
+    the previous one, and names are also sent on their own as soon as Gemini
+    writes them, without waiting for any lookup. Failures end the stream with
+    an "error" event instead.
+    
+    Args:
+        user_prompt (str): What the user asked for
+        user (User): User whose favorites are flagged
+        full (bool): Send complete game dicts instead of the compact schema
+        core (bool): Leave out the sections the page loads on demand
+        
+    Yields:
+        dict: Events in the order they should be sent
+    """
+    game_names = []
+    events = asyncio.Queue()
+    
+    async def recommended_names():
+        # Announce each name as Gemini writes it, before its IGDB lookup starts
+        async for game_name in aiter_game_recommendations(user_prompt):
+            game_names.append(game_name)
+            events.put_nowait(('names', None))
+            yield game_name
+    
+    async def pump():
+        # Pass each looked-up game on, then the end of the lookups (or their failure)
+        try:
+            async with aclosing(aiter_game_details(recommended_names(), core=core)) as details:
+                async for index, game in details:
+                    events.put_nowait(('game', (index, game)))
+            events.put_nowait(('done', None))
+        except Exception as e:
+            events.put_nowait(('error', e))
+    
+    def names_event():
+        return {'type': 'names', 'schema_version': SCHEMA_VERSION, 'names': list(game_names)}
+    
+    def game_event(role, index, game):
+        game = game if full else compact_main_game(game, core) if role == 'main' else compact_similar_game(game)
+        game['is_favorite'] = game['id'] in favorite_ids
+        return {'type': 'game', 'role': role, 'index': index, 'game': game}
+    
+    task = None
+    try:
+        favorite_ids = await sync_to_async(get_favorite_ids)(user)
+        task = asyncio.create_task(pump())
+        
+        games = {}
+        sent = set()
+        sent_names = 0
+        while True:
+            kind, value = await events.get()
+            if kind == 'error':
+                raise value
+            if kind == 'done':
+                break
+            # Several names may be queued at once; send them as one event
+            if len(game_names) > sent_names:
+                sent_names = len(game_names)
+                yield names_event()
+            if kind != 'game':
+                continue
+            
+            index, game = value
+            games[index] = game
+            
+            # The first name is the main game; similar games wait until it is sent
+            if 0 not in games:
+                continue
+            if 0 not in sent:
+                sent.add(0)
+                if games[0] is not None:
+                    yield game_event('main', 0, games[0])
+            
+            for similar_index in sorted(games):
+                if games[similar_index] is not None and similar_index not in sent:
+                    sent.add(similar_index)
+                    yield game_event('similar', similar_index, games[similar_index])
+        
+        if len(game_names) > sent_names or not game_names:
+            yield names_event()
+        yield {'type': 'done', 'found': games.get(0) is not None}
+    except Exception as e:
+        yield {'type': 'error', 'error': str(e)}
+    finally:
+        # The client may disconnect before the lookups are done
+        if task:
+            task.cancel()
+
+async def _format_events(events, stream):
+    """
+    Serialize streamed events as newline-delimited JSON or Server-Sent Events
+    
+    Args:
+        events (async iterator): Events from _recommendation_events()
+        stream (str): One of STREAM_CONTENT_TYPES
+        
+    Yields:
+        str: One serialized event at a time
+    """
+    async for event in events:
+        data = json.dumps(event, separators=(',', ':'))
+        if stream == 'sse':
+            yield f"event: {event['type']}\ndata: {data}\n\n"
+        else:
+            yield data + '\n'
+
+@login_required
+def game_add_ons(request, game_id):
+    """Get the DLCs and expansions of a game when its add-on section is opened"""
+    return _game_section_response(game_id, lambda game: {
+        'add_ons': compact_add_ons(get_game_add_ons(game)),
+    })
+
+@login_required
+def game_franchise(request, game_id):
+    """Get the franchise timeline of a game when it is opened"""
+    def section(game):
+        franchise = get_game_franchise(game)
+        return {'franchise': compact_franchise(franchise) if franchise else None}
+    return _game_section_response(game_id, section)
+
+@login_required
+def game_screenshots(request, game_id):
+    """Get one page (?page=, from 1) of a game's screenshots"""
+    def section(game):
+        page = max(int(request.GET.get('page', 1)), 1)
+        screenshots = game.get('screenshots') or []
+        start = (page - 1) * SCREENSHOT_PAGE_SIZE
+        return {
+            'screenshots': compact_screenshots(screenshots[start:start + SCREENSHOT_PAGE_SIZE]),
+            'page': page,
+            'total': len(screenshots),
+            'has_more': start + SCREENSHOT_PAGE_SIZE < len(screenshots),
+        }
+    return _game_section_response(game_id, section)
+
+@login_required
+def game_languages(request, game_id):
+    """Get the language support table of a game when it is opened"""
+    return _game_section_response(game_id, lambda game: {
+        'language_support': game.get('language_support') or {},
+    })
+
+def _game_section_response(game_id, section):
+    """
+    Answer a request for one section of a game card
+    
+    Args:
+        game_id (int): IGDB ID of the game
+        section (callable): Builds the section's fields from the processed game
+        
+    Returns:
+        JsonResponse: The section, or the error
+    """
+    try:
+        game = get_game_by_id(game_id)
+        if game is None:
+            return JsonResponse({'success': False, 'error': 'Game not found'})
+        return JsonResponse({'success': True, **section(game)}, json_dumps_params={'separators': (',', ':')})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
 
 @login_required
 def toggle_favorite(request):
-    """Toggle a game as favorite"""
+    """
+    Add or remove a game as favorite
+    
+    The page sends the state the user chose ({"favorite": true or false}),
+    so a repeated or reordered request cannot flip it back; each is a
+    single INSERT or DELETE that changes nothing if the game already is in
+    that state. Without "favorite" the current state is flipped, taken from
+    the cached favorite ids. If the cache was stale, the statement changes
+    nothing (or hits the unique constraint) and the other one is run
+    instead. Answers with the resulting "favorite" state.
+    """
     if request.method == 'POST':
         try:
             data = json.loads(request.body)
-            game_id = data.get('game_id')
-            
-            # Check if this game is already favorited
-            existing_favorite = Favorite.objects.filter(user=request.user, game_id=game_id).first()
+            game_id = int(data.get('game_id'))
+            favorite = data.get('favorite')
             
-            if existing_favorite:
-                # Remove from favorites
-                existing_favorite.delete()
-                return JsonResponse({'success': True, 'added': False})
+            if favorite is not None:
+                favorite = bool(favorite)
+                if favorite:
+                    _add_favorite(request.user, data)
+                else:
+                    _remove_favorites(request.user, [game_id])
+            elif game_id in get_favorite_ids(request.user):
+                # Remove from favorites, or add if it was already gone
+                favorite = not _remove_favorites(request.user, [game_id]) and _add_favorite(request.user, data)
             else:
-                # Add to favorites
-                name = data.get('name', '')
-                cover_url = data.get('cover_url')
-                summary = data.get('summary')
-                rating = data.get('rating')
-                first_release_date = data.get('first_release_date')
-                
-                # Convert timestamp to datetime if provided
-                release_date = None
-                if first_release_date:
-                    try:
-                        release_date = datetime.fromtimestamp(first_release_date)
-                    except:
-                        pass
-                
-                # Create new favorite
-                Favorite.objects.create(
-                    user=request.user,
-                    game_id=game_id,
-                    name=name,
-                    cover_url=cover_url,
-                    summary=summary,
-                    rating=rating,
-                    first_release_date=release_date
-                )
-                return JsonResponse({'success': True, 'added': True})
+                # Add to favorites, or remove if it was already there
+                favorite = _add_favorite(request.user, data) or not _remove_favorites(request.user, [game_id])
+            return JsonResponse({'success': True, 'favorite': favorite})
                 
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
     return JsonResponse({'success': False, 'error': 'Invalid request'})
 
+@login_required
+def bulk_favorites(request):
+    """
+    Add or remove many favorites at once
+    
+    Expects {"action": "add", "games": [...]} with the same game fields as
+    toggle_favorite(), {"action": "import", "game_ids": [...]} to add games
+    with their details fetched from IGDB, or {"action": "remove",
+    "game_ids": [...]}. Games that are already favorites are skipped, so
+    imports can be re-run.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'error': 'Invalid request'})
+    try:
+        data = json.loads(request.body)
+        action = data.get('action')
+        if action not in BULK_FAVORITE_ACTIONS:
+            return JsonResponse({'success': False, 'error': f"Unknown action: {action}"})
+        
+        if action in ('import', 'remove'):
+            game_ids = [int(game_id) for game_id in data.get('game_ids', [])]
+            if len(game_ids) > MAX_BULK_FAVORITES:
+                return JsonResponse({'success': False, 'error': f"At most {MAX_BULK_FAVORITES} favorites per request"})
+            if action == 'remove':
+                return JsonResponse({'success': True, 'removed': _remove_favorites(request.user, game_ids)})
+            
+            added, skipped, failed = import_favorites(get_igdb_client(), request.user, game_ids)
+            return JsonResponse({'success': True, 'added': added, 'skipped': skipped, 'failed': failed})
+        
+        games = data.get('games', [])
+        if len(games) > MAX_BULK_FAVORITES:
+            return JsonResponse({'success': False, 'error': f"At most {MAX_BULK_FAVORITES} favorites per request"})
+        favorites = [_favorite_from_data(request.user, game) for game in games]
+        
+        # Count from the database what is new; the cached ids may be stale
+        game_ids = {favorite.game_id for favorite in favorites}
+        existing_ids = set(
+            Favorite.objects.filter(user=request.user, game_id__in=game_ids).values_list('game_id', flat=True)
+        )
+        new_favorites = [favorite for favorite in favorites if favorite.game_id not in existing_ids]
+        # Duplicates, and games a concurrent request just added, are left alone by the database
+        Favorite.objects.bulk_create(new_favorites, batch_size=500, ignore_conflicts=True)
+        forget_favorite_ids(request.user)
+        added = len(game_ids - existing_ids)
+        return JsonResponse({'success': True, 'added': added, 'skipped': len(favorites) - added})
+    except Exception as e:
+        return JsonResponse({'success': False, 'error': str(e)})
+
+def _favorite_from_data(user, data):
+    """
+    Build an unsaved Favorite from the game fields the page sends
+    
+    Args:
+        user (User): User the favorite belongs to
+        data (dict): game_id and name, and optionally cover_url, summary,
+            rating and first_release_date (UNIX timestamp)
+        
+    Returns:
+        Favorite: The favorite, not saved yet
+    """
+    # Convert timestamp to datetime if provided
+    release_date = None
+    if data.get('first_release_date'):
+        try:
+            release_date = datetime.fromtimestamp(float(data['first_release_date']), timezone.utc)
+        except (TypeError, ValueError, OverflowError, OSError):
+            pass
+    
+    rating = data.get('rating')
+    return Favorite(
+        user=user,
+        game_id=int(data['game_id']),
+        name=data.get('name', ''),
+        cover_url=data.get('cover_url') or None,
+        summary=data.get('summary') or None,
+        rating=float(rating) if rating not in (None, '') else None,
+        first_release_date=release_date,
+    )
+
+def _add_favorite(user, data):
+    """
+    Add a favorite with one INSERT
+    
+    Returns:
+        bool: Whether it was added, False if the game already was a favorite
+    """
+    favorite = _favorite_from_data(user, data)
+    try:
+        # A savepoint, so the failed INSERT does not break an outer transaction
+        with transaction.atomic():
+            favorite.save(force_insert=True)
+        added = True
+    except IntegrityError:
+        # Already a favorite, e.g. added by a concurrent request
+        added = False
+    forget_favorite_ids(user)
+    return added
+
+def _remove_favorites(user, game_ids):
+    """
+    Remove favorites with one DELETE
+    
+    Returns:
+        int: Number of favorites removed
+    """
+    removed, _ = Favorite.objects.filter(user=user, game_id__in=game_ids).delete()
+    forget_favorite_ids(user)
+    return removed
+
 @login_required
 def get_favorites(request):
     """Get the status of whether a specific game is favorited"""
@@ -95,13 +433,111 @@ def get_favorites(request):
         game_id = request.GET.get('game_id')
         
         if game_id:
-            is_favorite = Favorite.objects.filter(user=request.user, game_id=game_id).exists()
+            is_favorite = int(game_id) in get_favorite_ids(request.user)
             return JsonResponse({'is_favorite': is_favorite})
         
     return JsonResponse({'is_favorite': False})
 
+@login_required
+def favorite_status(request):
+    """Get whether each of several games (?game_ids=1,2,3) is favorited"""
+    try:
+        game_ids = [int(game_id) for game_id in request.GET.get('game_ids', '').split(',') if game_id.strip()]
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid game ids'})
+    if len(game_ids) > MAX_FAVORITE_STATUS_IDS:
+        return JsonResponse({'success': False, 'error': f"At most {MAX_FAVORITE_STATUS_IDS} game ids per request"})
+    
+    favorite_ids = get_favorite_ids(request.user)
+    return JsonResponse({
+        'success': True,
+        'is_favorite': {str(game_id): game_id in favorite_ids for game_id in game_ids},
+    })
+
 @login_required
 def favorites_page(request):
-    """View for the favorites page"""
-    favorites = Favorite.objects.filter(user=request.user).order_by('-created_at')
-    return render(request, 'recommender/favorites.html', {'favorites': favorites})
\ No newline at end of file
+    """View for the favorites page, with the first page of favorites; the rest load as the user scrolls"""
+    favorites, next_cursor = _favorites_page(request.user)
+    return render(request, 'recommender/favorites.html', {
+        'favorites': favorites,
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+def favorites_list(request):
+    """Get the next page of favorites (?cursor= from the previous page) for infinite scrolling"""
+    try:
+        favorites, next_cursor = _favorites_page(request.user, request.GET.get('cursor'))
+        return JsonResponse({'success': True, 'favorites': favorites, 'next_cursor': next_cursor})
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Invalid cursor'})
+
+@login_required
+def favorite_summary(request, game_id):
+    """Get the summary of a favorite when its card is expanded"""
+    favorite = Favorite.objects.filter(user=request.user, game_id=game_id).only('summary').first()
+    if favorite is None:
+        return JsonResponse({'success': False, 'error': 'Favorite not found'})
+    return JsonResponse({'success': True, 'summary': favorite.summary})
+
+def _favorites_page(user, cursor=None):
+    """
+    Get one page of a user's favorites, newest first
+    
+    Pages are keyset-paginated on (created_at, id), which the (user,
+    created_at) index serves directly, so every page costs the same however
+    deep the user scrolls. The summary is left out (see favorite_summary()).
+    
+    Args:
+        user (User): User whose favorites to list
+        cursor (str): Cursor returned with the previous page, or None for the first page
+        
+    Returns:
+        tuple: (list of favorite card dicts, cursor of the next page or None)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    favorites = Favorite.objects.filter(user=user).defer('summary').order_by('-created_at', '-id')
+    if cursor:
+        created_at, favorite_id = _decode_favorites_cursor(cursor)
+        favorites = favorites.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=favorite_id))
+    
+    # One extra row tells whether there is a next page
+    favorites = list(favorites[:FAVORITES_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(favorites) > FAVORITES_PAGE_SIZE:
+        favorites = favorites[:FAVORITES_PAGE_SIZE]
+        next_cursor = _encode_favorites_cursor(favorites[-1])
+    
+    return [{
+        'game_id': favorite.game_id,
+        'name': favorite.name,
+        'cover_url': favorite.cover_url,
+        'rating': round(favorite.rating, 1) if favorite.rating is not None else None,
+        'release_date': format_date(favorite.first_release_date, 'F d, Y') if favorite.first_release_date else None,
+    } for favorite in favorites], next_cursor
+
+def _encode_favorites_cursor(favorite):
+    """Build the opaque cursor of the page after this favorite"""
+    position = f"{favorite.created_at.isoformat()}|{favorite.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+def _decode_favorites_cursor(cursor):
+    """Read the (created_at, id) position from a cursor, raising ValueError if it is malformed"""
+    try:
+        created_at, favorite_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+    except (UnicodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+    return datetime.fromisoformat(created_at), int(favorite_id)
+
+@user_passes_test(lambda user: user.is_staff)
+def service_stats(request):
+    """Report runtime statistics used to size the deployment (staff only)"""
+    semantic_index = get_semantic_index()
+    return JsonResponse({
+        'igdb_rate_limiter': get_igdb_client().rate_limiter.stats(),
+        'gemini': get_gemini_stats(),
+        'caches': get_cache_stats(),
+        'semantic_cache': semantic_index.stats() if semantic_index else None,
+    })
\ No newline at end of file